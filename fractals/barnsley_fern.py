@@ -1,6 +1,8 @@
 import numpy as np
 from numba import jit
 
+from chaos_game import chaos_game, chaos_game_density
+
 def get_predefined_parameters():
     """
     Zwraca klasyczne parametry paproci Barnsleya.
@@ -61,20 +63,76 @@ def barnsley_fern_numba(n_points, probabilities, transforms):
     return points
 
 
-def barnsley_fern(n_points, parameters):
+def _parameter_arrays(parameters):
+    """Słownik parametrów -> (prawdopodobieństwa, tablica współczynników 4x6) jako numpy arrays."""
+    probabilities = np.array(parameters['probabilities'], dtype=np.float64)
+    transforms_list = parameters['transforms']
+    # konwertujemy listę słowników na tablicę numpy (4 transformacje x 6 współczynników)
+    transforms_array = np.array([[t['a'], t['b'], t['c'], t['d'], t['e'], t['f']] for t in transforms_list], dtype=np.float64)
+    return probabilities, transforms_array
+
+
+def barnsley_fern(n_points, parameters, seed=None, n_threads=None, should_cancel=None):
     """
-    Opakowuje funkcję Numba - przygotowuje dane (słowniki -> numpy arrays) i wywołuje zoptymalizowaną wersję.
+    Przygotowuje dane (słowniki -> numpy arrays) i generuje punkty grą w chaos na wielu
+    wątkach (chaos_game() - niezależne strumienie zamiast jednej szeregowej orbity).
     
     Args:
         n_points: liczba punktów do wygenerowania
         parameters: słownik z 'probabilities' i 'transforms'
+        seed: ziarno - ten sam seed daje te same punkty niezależnie od liczby wątków
+        n_threads: liczba wątków (domyślnie liczba rdzeni)
     
     Returns:
-        numpy array z punktami paproci
+        numpy array z punktami paproci lub None jeśli przerwano
     """
-    probabilities = np.array(parameters['probabilities'], dtype=np.float64)
-    transforms_list = parameters['transforms']
-    # konwertujemy listę słowników na tablicę numpy (4 transformacje x 6 współczynników)
-    transforms_array = np.array([[t['a'], t['b'], t['c'], t['d'], t['e'], t['f']] for t in transforms_list], dtype=np.float64)
-    
-    return barnsley_fern_numba(n_points, probabilities, transforms_array)
+    probabilities, transforms_array = _parameter_arrays(parameters)
+    return chaos_game(
+        n_points, probabilities, transforms_array, seed=seed, n_threads=n_threads, should_cancel=should_cancel,
+    )
+
+
+def barnsley_fern_density(
+    n_samples, parameters, width, height, seed=None, n_threads=None, should_cancel=None, stats=None,
+):
+    """
+    Histogram gęstości paproci (height, width) z n_samples punktów bez ich zapisywania
+    (chaos_game_density()) - pamięć nie zależy od liczby próbek.
+
+    Returns:
+        histogram float64 liczby trafień (wiersz 0 = dół) lub None jeśli przerwano
+    """
+    probabilities, transforms_array = _parameter_arrays(parameters)
+    return chaos_game_density(
+        n_samples, probabilities, transforms_array, width, height, seed=seed, n_threads=n_threads,
+        should_cancel=should_cancel, stats=stats,
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    from mandelbrot_engine import default_thread_count
+
+    parameters = get_predefined_parameters()
+    probabilities, transforms_array = _parameter_arrays(parameters)
+    barnsley_fern_numba(1000, probabilities, transforms_array)
+    barnsley_fern(1000, parameters)
+
+    n_points = 20_000_000
+    start = time.perf_counter()
+    barnsley_fern_numba(n_points, probabilities, transforms_array)
+    serial = time.perf_counter() - start
+    print(f"Paproc Barnsleya, {n_points} punktow:")
+    print(f"  {'szeregowo':>12}: {serial:6.2f} s ({n_points / serial:,.0f} punktow/s)")
+    for n_threads in sorted({1, default_thread_count()}):
+        start = time.perf_counter()
+        points = barnsley_fern(n_points, parameters, seed=1, n_threads=n_threads)
+        elapsed = time.perf_counter() - start
+        print(f"  {f'{n_threads} watki':>12}: {elapsed:6.2f} s ({n_points / elapsed:,.0f} punktow/s, "
+              f"{serial / elapsed:.1f}x)")
+
+    # ten sam seed - te same punkty niezależnie od liczby wątków
+    if not np.array_equal(barnsley_fern(1_000_000, parameters, seed=7, n_threads=1),
+                          barnsley_fern(1_000_000, parameters, seed=7, n_threads=4)):
+        raise RuntimeError("Wynik zalezy od liczby watkow.")
@@ -0,0 +1,199 @@
+import threading
+
+import numpy as np
+from numba import jit
+
+from mandelbrot_engine import mandelbrot_set_parallel, run_tiles
+from mandelbrot_set import _escape_time
+
+# Zakres rastra gęstości (płaszczyzna punktów orbit)
+DEFAULT_BUDDHA_BOUNDS = (-2.0, 1.0, -1.5, 1.5)
+# Obszar losowania c - górna półpłaszczyzna wokół zbioru; orbita c i sprzężonego c są swoimi
+# lustrzanymi odbiciami, więc każdą orbitę zapisujemy dwa razy (z i sprzężone z)
+SAMPLE_BOUNDS = (-2.0, 0.6, 0.0, 1.2)
+# Siatka komórek mapy ważności i liczba próbek renderu próbnego na bok komórki
+IMPORTANCE_CELLS_X = 256
+IMPORTANCE_OVERSAMPLING = 4
+# Waga komórek bez użytecznych próbek (względem średniej) - każda komórka musi mieć niezerowe
+# prawdopodobieństwo, inaczej wynik nie byłby nieobciążony
+IMPORTANCE_FLOOR = 0.02
+# Próbki na zadanie - zadania (z własnym ziarnem) rozdzielane są między wątki jak kafelki
+SAMPLES_PER_CHUNK = 200_000
+
+
+def importance_map(max_iter, min_iter, cells_x=IMPORTANCE_CELLS_X, oversampling=IMPORTANCE_OVERSAMPLING, n_threads=None):
+    """
+    Mapa ważności losowania c: obszar SAMPLE_BOUNDS dzielony jest na komórki, a waga komórki to
+    liczba próbek renderu próbnego (oversampling^2 na komórkę), których orbity uciekają po
+    min_iter..max_iter krokach - tylko takie trafiają do obrazu. Komórki w głębi zbioru i daleko
+    od niego (orbity nieuciekające lub bardzo krótkie) dostają tylko wagę minimalną.
+
+    Returns:
+        (wagi komórek float64 (cells_y, cells_x), cells_x, cells_y)
+    """
+    xmin, xmax, ymin, ymax = SAMPLE_BOUNDS
+    cells_y = max(1, round(cells_x * (ymax - ymin) / (xmax - xmin)))
+    width, height = cells_x * oversampling, cells_y * oversampling
+    # próbki w środkach pod-komórek
+    half_x = 0.5 * (xmax - xmin) / width
+    half_y = 0.5 * (ymax - ymin) / height
+    probe = mandelbrot_set_parallel(
+        xmin + half_x, xmax - half_x, ymin + half_y, ymax - half_y, width, height, max_iter,
+        n_threads=n_threads, interior_checks=True,
+    )
+    useful = (probe >= min_iter) & (probe < max_iter)
+    weights = useful.reshape(cells_y, oversampling, cells_x, oversampling).sum(axis=(1, 3)).astype(np.float64)
+    weights += IMPORTANCE_FLOOR * max(weights.mean(), 1.0)
+    return weights, cells_x, cells_y
+
+
+@jit(nopython=True, nogil=True)
+def buddhabrot_chunk(
+    hist, cdf, sample_weight, cells_x, sample_bounds, raster_bounds, n_samples, min_iter, max_iter, seed,
+):
+    """
+    Losuje n_samples wartości c (komórka wg dystrybuanty cdf, punkt jednostajnie w komórce)
+    i dla orbit uciekających po min_iter..max_iter krokach dodaje do hist odwiedzone punkty z
+    (oraz ich odbicia względem osi rzeczywistej) z wagą sample_weight komórki - odwrotnością
+    względnego prawdopodobieństwa wylosowania, więc wynik odpowiada losowaniu jednostajnemu.
+    Ucieczkę rozstrzyga _escape_time() ze skrótami dla wnętrza - orbity c ze zbioru (najdroższe)
+    odrzucane są zwykle od razu; orbitę uciekającą liczymy drugi raz, zapisując punkty.
+    Generator Numby jest osobny dla każdego wątku; ziarno ustawiane na początku zadania
+    sprawia, że wynik nie zależy od przydziału zadań do wątków.
+
+    Returns:
+        liczba orbit dodanych do histogramu
+    """
+    np.random.seed(seed)
+    height, width = hist.shape
+    s_xmin, s_xmax, s_ymin, s_ymax = sample_bounds
+    r_xmin, r_xmax, r_ymin, r_ymax = raster_bounds
+    cells_y = cdf.shape[0] // cells_x
+    cell_w = (s_xmax - s_xmin) / cells_x
+    cell_h = (s_ymax - s_ymin) / cells_y
+    scale_x = width / (r_xmax - r_xmin)
+    scale_y = height / (r_ymax - r_ymin)
+    last = cdf.shape[0] - 1
+
+    orbits = 0
+    for _ in range(n_samples):
+        cell = min(np.searchsorted(cdf, np.random.random(), side="right"), last)
+        cell_row = cell // cells_x
+        cell_col = cell - cell_row * cells_x
+        cr = s_xmin + (cell_col + np.random.random()) * cell_w
+        ci = s_ymin + (cell_row + np.random.random()) * cell_h
+        n = _escape_time(cr, ci, max_iter, True)[0]
+        if n >= max_iter or n < min_iter:
+            continue
+
+        orbits += 1
+        weight = sample_weight[cell]
+        x, y = 0.0, 0.0
+        for _ in range(n):
+            x, y = x * x - y * y + cr, 2.0 * x * y + ci
+            col = int((x - r_xmin) * scale_x)
+            if col < 0 or col >= width:
+                continue
+            row = int((y - r_ymin) * scale_y)
+            if 0 <= row < height:
+                hist[row, col] += weight
+            row = int((-y - r_ymin) * scale_y)
+            if 0 <= row < height:
+                hist[row, col] += weight
+    return orbits
+
+
+def buddhabrot(
+    width, height, n_samples, max_iter, min_iter=20, bounds=DEFAULT_BUDDHA_BOUNDS, importance=True,
+    seed=0, n_threads=None, should_cancel=None, stats=None,
+):
+    """
+    Raster gęstości Buddhabrota: ile razy orbity uciekających punktów c odwiedziły każdy piksel.
+    Próbki dzielone są na zadania po SAMPLES_PER_CHUNK, liczone na wielu wątkach; każdy wątek
+    sumuje do własnego histogramu (bez blokad i wyścigów), a histogramy są sumowane na końcu.
+    importance=True losuje c wg importance_map() - większość próbek trafia w pobliże brzegu
+    zbioru, gdzie orbity są długie, zamiast marnować się na wnętrze i szybkie ucieczki.
+
+    Args:
+        n_samples: liczba losowanych wartości c
+        max_iter, min_iter: zakres liczby kroków do ucieczki orbit dodawanych do obrazu
+        bounds: zakres rastra (xmin, xmax, ymin, ymax)
+        seed: ziarno - ten sam seed daje ten sam obraz niezależnie od liczby wątków
+        stats: opcjonalny słownik uzupełniany o 'samples', 'orbits' (orbity dodane do obrazu)
+
+    Returns:
+        raster float64 (height, width) z wierszem 0 = ymin jak w mandelbrot_set() lub None jeśli przerwano
+    """
+    if min_iter >= max_iter:
+        raise ValueError("Minimalna liczba iteracji musi byc mniejsza od maksymalnej.")
+    if n_samples <= 0:
+        raise ValueError("Liczba probek musi byc dodatnia.")
+    if importance:
+        weights, cells_x, _ = importance_map(max_iter, min_iter, n_threads=n_threads)
+        weights = weights.ravel()
+    else:
+        cells_x = 1
+        weights = np.ones(1)
+    probabilities = weights / weights.sum()
+    cdf = np.cumsum(probabilities)
+    # waga próbki = (1 / liczba komórek) / prawdopodobieństwo komórki
+    sample_weight = 1.0 / (len(probabilities) * probabilities)
+
+    n_chunks = -(-n_samples // SAMPLES_PER_CHUNK)
+    # niezależne ziarna zadań (SeedSequence) - strumienie różnych seed się nie pokrywają
+    chunk_seeds = np.random.SeedSequence(seed).generate_state(n_chunks)
+    local = threading.local()
+    histograms = []
+    orbits = []
+
+    def chunk_fn(_row0, _row1, chunk0, chunk1):
+        hist = getattr(local, "hist", None)
+        if hist is None:
+            hist = local.hist = np.zeros((height, width), dtype=np.float64)
+            histograms.append(hist)
+        for chunk in range(chunk0, chunk1):
+            samples = min(SAMPLES_PER_CHUNK, n_samples - chunk * SAMPLES_PER_CHUNK)
+            orbits.append(buddhabrot_chunk(
+                hist, cdf, sample_weight, cells_x, SAMPLE_BOUNDS, bounds, samples, min_iter, max_iter,
+                int(chunk_seeds[chunk]),
+            ))
+
+    if not run_tiles(chunk_fn, n_chunks, 1, n_threads, 1, should_cancel):
+        return None
+    if stats is not None:
+        stats["samples"] = n_samples
+        stats["orbits"] = sum(orbits)
+    density = np.sum(histograms, axis=0) if histograms else np.zeros((height, width))
+    # dwa zapisy na punkt (z i sprzężone z) przy losowaniu tylko z górnej półpłaszczyzny
+    return density / (2.0 * n_samples)
+
+
+if __name__ == "__main__":
+    import time
+
+    from mandelbrot_engine import default_thread_count
+
+    width = height = 500
+    max_iter, min_iter = 1000, 20
+    buddhabrot(64, 64, 1000, 100, 10)
+    buddhabrot(64, 64, 1000, 100, 10, importance=False)
+
+    n_samples = 2_000_000
+    print(f"Buddhabrot {width}x{height}, {n_samples} probek, min_iter={min_iter}, max_iter={max_iter}, "
+          f"watki: {default_thread_count()}:")
+    results = {}
+    for importance in (False, True):
+        stats = {}
+        start = time.perf_counter()
+        results[importance] = buddhabrot(width, height, n_samples, max_iter, min_iter, importance=importance, stats=stats)
+        elapsed = time.perf_counter() - start
+        label = "mapa waznosci" if importance else "jednostajnie"
+        print(
+            f"  {label:>14}: {elapsed:6.2f} s, orbity w obrazie {stats['orbits']:>9} "
+            f"({stats['orbits'] / n_samples:6.1%} probek, {stats['orbits'] / elapsed:,.0f} orbit/s, "
+            f"{n_samples / elapsed:,.0f} probek/s)"
+        )
+
+    # oba estymatory mają tę samą wartość oczekiwaną - różnią się szumem
+    uniform, weighted = results[False], results[True]
+    print(f"  wzgledna roznica sumy gestosci: {abs(weighted.sum() - uniform.sum()) / uniform.sum():.2%}")
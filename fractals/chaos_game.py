@@ -0,0 +1,331 @@
+import threading
+
+import numpy as np
+from numba import jit
+
+from mandelbrot_engine import run_tiles
+
+# Kroki odrzucane na początku każdego strumienia - punkt startowy (0, 0) zwykle nie leży na
+# atraktorze, a przy kontrakcjach odległość od niego maleje wykładniczo
+BURN_IN = 100
+# Punkty na strumień - strumienie (z własnym ziarnem i rozbiegiem) rozdzielane są między wątki
+# jak kafelki; rozbieg to 0.04% pracy strumienia, a strumieni wystarcza do zrównoważenia wątków
+POINTS_PER_STREAM = 250_000
+# Punkt, który uciekł dalej niż RESET_LIMIT (IFS bez kontrakcji), wraca do (0, 0)
+RESET_LIMIT = 1e15
+# Próbka punktów, z której szacowany jest zakres atraktora dla histogramu, i margines zakresu
+BOUNDS_PROBE_POINTS = 200_000
+BOUNDS_MARGIN = 0.02
+# Liczby losowe generowane są blokami - pętla losowania nie przeplata się z pętlą punktów
+RANDOM_BLOCK = 4096
+
+
+def alias_table(probabilities):
+    """
+    Tablica aliasów Walkera (konstrukcja Vose'a): losowanie transformacji w czasie stałym,
+    niezależnym od ich liczby. Kolumna i (szerokość 1/n) dzielona jest na część transformacji i
+    o wysokości accept[i] i resztę należącą do alias[i]; każda kolumna ma sumaryczną wagę 1/n.
+
+    Returns:
+        (accept float64 (n,), alias int64 (n,))
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    n = len(probabilities)
+    scaled = probabilities * (n / probabilities.sum())
+    accept = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.int64)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        accept[s] = scaled[s]
+        alias[s] = l
+        # nadmiar l dopełnia kolumnę s
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # pozostałe kolumny mają wagę 1 z dokładnością do zaokrągleń (accept zostaje 1)
+    return accept, alias
+
+
+@jit(nopython=True, nogil=True)
+def pick_transform(u, accept, alias):
+    """
+    Transformacja dla u z [0, n) wg tablicy aliasów: część całkowita wybiera kolumnę,
+    ułamkowa - transformację kolumny albo jej alias. Jedna liczba losowa na wybór.
+    """
+    # min() - iloczyn r * n dla r bliskiego 1 może się zaokrąglić do n
+    column = min(int(u), accept.shape[0] - 1)
+    if u - column < accept[column]:
+        return column
+    return alias[column]
+
+
+@jit(nopython=True, nogil=True)
+def affine_step(transforms, idx, x, y):
+    """x' = ax + by + e, y' = cx + dy + f dla transformacji idx"""
+    t = transforms[idx]
+    return t[0] * x + t[1] * y + t[4], t[2] * x + t[3] * y + t[5]
+
+
+@jit(nopython=True, nogil=True)
+def chaos_game_stream(points, start, count, accept, alias, transforms, burn_in, limit, seed):
+    """
+    Jeden strumień gry w chaos: po burn_in krokach rozbiegu zapisuje do points[start:start + count]
+    kolejne punkty orbity, pomijając te poza kwadratem |x|, |y| < limit (żeby nie skalować
+    wykresu do dużych wartości). Gra w chaos jest ergodyczna - niezależne strumienie
+    rozkładają się na atraktorze tak samo jak jedna długa orbita, więc można je łączyć.
+    Generator Numby jest osobny dla każdego wątku; ziarno ustawiane na początku strumienia
+    sprawia, że wynik nie zależy od przydziału strumieni do wątków.
+
+    Args:
+        points: bufor wynikowy (n, 2) float64
+        accept, alias: tablica aliasów prawdopodobieństw transformacji (alias_table())
+        transforms: tablica współczynników (liczba transformacji x 6: a, b, c, d, e, f)
+
+    Returns:
+        liczba zapisanych punktów (zapisane są na początku przedziału)
+    """
+    np.random.seed(seed)
+    n_transforms = accept.shape[0]
+    total = burn_in + count
+    x = 0.0
+    y = 0.0
+    written = 0
+    for block_start in range(0, total, RANDOM_BLOCK):
+        block = np.random.random(min(RANDOM_BLOCK, total - block_start)) * n_transforms
+        for b in range(block.shape[0]):
+            x, y = affine_step(transforms, pick_transform(block[b], accept, alias), x, y)
+
+            if block_start + b >= burn_in and abs(x) < limit and abs(y) < limit:
+                points[start + written, 0] = x
+                points[start + written, 1] = y
+                written += 1
+
+            if abs(x) > RESET_LIMIT or abs(y) > RESET_LIMIT:
+                x, y = 0.0, 0.0
+    return written
+
+
+def chaos_game(
+    n_points, probabilities, transforms, limit=np.inf, seed=None, n_threads=None, should_cancel=None,
+):
+    """
+    Punkty atraktora IFS z gry w chaos liczonej wieloma niezależnymi strumieniami na wielu
+    wątkach. Strumienie mają stałą długość POINTS_PER_STREAM i ziarna wyprowadzone z seed
+    (SeedSequence), a każdy pisze do własnego fragmentu wyniku - ten sam seed daje te same
+    punkty w tej samej kolejności niezależnie od liczby wątków.
+
+    Args:
+        n_points: liczba kroków gry (punktów przed odfiltrowaniem)
+        probabilities: prawdopodobieństwa transformacji (sumujące się do 1)
+        transforms: tablica współczynników (liczba transformacji x 6)
+        limit: punkty z |x| lub |y| >= limit są pomijane
+        seed: ziarno (None - losowe przy każdym wywołaniu)
+        n_threads: liczba wątków (domyślnie liczba rdzeni)
+
+    Returns:
+        numpy array (n, 2) z n <= n_points punktami lub None jeśli przerwano
+    """
+    accept, alias = alias_table(probabilities)
+    transforms = np.ascontiguousarray(transforms, dtype=np.float64)
+    n_streams = max(1, -(-n_points // POINTS_PER_STREAM))
+    # niezależne ziarna strumieni (SeedSequence) - strumienie różnych seed się nie pokrywają
+    stream_seeds = np.random.SeedSequence(seed).generate_state(n_streams)
+    points = np.empty((n_points, 2), dtype=np.float64)
+    counts = np.zeros(n_streams, dtype=np.int64)
+
+    def stream_fn(_row0, _row1, stream0, stream1):
+        for stream in range(stream0, stream1):
+            start = stream * POINTS_PER_STREAM
+            count = min(POINTS_PER_STREAM, n_points - start)
+            counts[stream] = chaos_game_stream(
+                points, start, count, accept, alias, transforms, BURN_IN, limit, int(stream_seeds[stream]),
+            )
+
+    if not run_tiles(stream_fn, n_streams, 1, n_threads, 1, should_cancel):
+        return None
+    if counts.sum() == n_points:
+        return points
+    # odfiltrowane punkty zostawiają luki na końcach fragmentów strumieni
+    return np.concatenate([
+        points[stream * POINTS_PER_STREAM:stream * POINTS_PER_STREAM + counts[stream]]
+        for stream in range(n_streams)
+    ])
+
+
+@jit(nopython=True, nogil=True)
+def chaos_game_density_stream(hist, count, accept, alias, transforms, burn_in, bounds, seed):
+    """
+    Strumień gry w chaos jak chaos_game_stream(), ale bez zapisywania punktów: każdy punkt
+    zwiększa licznik piksela histogramu hist (wiersz 0 = ymin) w zakresie bounds.
+    Punkty poza zakresem są pomijane. Pamięć nie zależy od liczby punktów.
+
+    Returns:
+        liczba punktów, które trafiły do histogramu
+    """
+    np.random.seed(seed)
+    height, width = hist.shape
+    xmin, xmax, ymin, ymax = bounds
+    scale_x = width / (xmax - xmin)
+    scale_y = height / (ymax - ymin)
+    n_transforms = accept.shape[0]
+    total = burn_in + count
+    x = 0.0
+    y = 0.0
+    hits = 0
+    for block_start in range(0, total, RANDOM_BLOCK):
+        block = np.random.random(min(RANDOM_BLOCK, total - block_start)) * n_transforms
+        for b in range(block.shape[0]):
+            x, y = affine_step(transforms, pick_transform(block[b], accept, alias), x, y)
+
+            if abs(x) > RESET_LIMIT or abs(y) > RESET_LIMIT:
+                x, y = 0.0, 0.0
+            elif block_start + b >= burn_in:
+                # porównania zmiennoprzecinkowe przed int() - NaN i wartości spoza zakresu odpadają
+                fx = (x - xmin) * scale_x
+                fy = (y - ymin) * scale_y
+                if 0.0 <= fx < width and 0.0 <= fy < height:
+                    hist[int(fy), int(fx)] += 1.0
+                    hits += 1
+    return hits
+
+
+def attractor_bounds(probabilities, transforms, width, height, limit=np.inf, seed=None, n_threads=None):
+    """
+    Zakres (xmin, xmax, ymin, ymax) histogramu dla atraktora: zakres próbki BOUNDS_PROBE_POINTS
+    punktów z marginesem BOUNDS_MARGIN, poszerzony tak, żeby piksele były kwadratowe.
+    """
+    points = chaos_game(BOUNDS_PROBE_POINTS, probabilities, transforms, limit, seed, n_threads)
+    if len(points) == 0:
+        raise ValueError("Brak punktow atraktora w zadanym zakresie.")
+    (xmin, ymin), (xmax, ymax) = points.min(axis=0), points.max(axis=0)
+    span_x = max(xmax - xmin, 1e-12) * (1.0 + 2.0 * BOUNDS_MARGIN)
+    span_y = max(ymax - ymin, 1e-12) * (1.0 + 2.0 * BOUNDS_MARGIN)
+    # jednakowa skala w obu osiach (jak equal_aspects na wykresie punktowym)
+    scale = max(span_x / width, span_y / height)
+    center_x, center_y = 0.5 * (xmin + xmax), 0.5 * (ymin + ymax)
+    half_x, half_y = 0.5 * scale * width, 0.5 * scale * height
+    return center_x - half_x, center_x + half_x, center_y - half_y, center_y + half_y
+
+
+def chaos_game_density(
+    n_samples, probabilities, transforms, width, height, bounds=None, limit=np.inf, seed=None,
+    n_threads=None, should_cancel=None, stats=None,
+):
+    """
+    Histogram gęstości atraktora IFS (height, width) z n_samples kroków gry w chaos - bez
+    tablicy punktów, więc pamięć to O(pikseli) niezależnie od liczby próbek (także miliardów).
+    Strumienie i ziarna jak w chaos_game(); każdy wątek sumuje do własnego histogramu (bez
+    blokad i wyścigów), a histogramy są sumowane na końcu. Liczniki są całkowite, więc
+    ten sam seed daje dokładnie ten sam histogram niezależnie od liczby wątków.
+
+    Args:
+        n_samples: liczba kroków gry
+        width, height: rozmiar histogramu w pikselach
+        bounds: (xmin, xmax, ymin, ymax), domyślnie attractor_bounds()
+        limit: jak w chaos_game() - przy szacowaniu zakresu punkty z |x| lub |y| >= limit są pomijane
+        stats: opcjonalny słownik uzupełniany o 'bounds' i 'hits' (punkty w histogramie)
+
+    Returns:
+        histogram float64 (height, width) liczby trafień z wierszem 0 = ymin lub None jeśli przerwano
+    """
+    accept, alias = alias_table(probabilities)
+    transforms = np.ascontiguousarray(transforms, dtype=np.float64)
+    if bounds is None:
+        bounds = attractor_bounds(probabilities, transforms, width, height, limit, seed, n_threads)
+    bounds = tuple(float(v) for v in bounds)
+
+    n_streams = max(1, -(-n_samples // POINTS_PER_STREAM))
+    stream_seeds = np.random.SeedSequence(seed).generate_state(n_streams)
+    local = threading.local()
+    histograms = []
+    hits = []
+
+    def stream_fn(_row0, _row1, stream0, stream1):
+        hist = getattr(local, "hist", None)
+        if hist is None:
+            hist = local.hist = np.zeros((height, width), dtype=np.float64)
+            histograms.append(hist)
+        for stream in range(stream0, stream1):
+            count = min(POINTS_PER_STREAM, n_samples - stream * POINTS_PER_STREAM)
+            hits.append(chaos_game_density_stream(
+                hist, count, accept, alias, transforms, BURN_IN, bounds, int(stream_seeds[stream]),
+            ))
+
+    if not run_tiles(stream_fn, n_streams, 1, n_threads, 1, should_cancel):
+        return None
+    if stats is not None:
+        stats["bounds"] = bounds
+        stats["hits"] = sum(hits)
+    return np.sum(histograms, axis=0) if histograms else np.zeros((height, width))
+
+
+if __name__ == "__main__":
+    import time
+
+    @jit(nopython=True, nogil=True)
+    def linear_scan_stream(points, count, cumsum_probs, transforms, seed):
+        """Poprzednia pętla do porównania: rand() na punkt i liniowe przeszukanie dystrybuanty."""
+        np.random.seed(seed)
+        x = 0.0
+        y = 0.0
+        for k in range(count):
+            r = np.random.rand()
+            idx = 0
+            for i in range(len(cumsum_probs)):
+                if r <= cumsum_probs[i]:
+                    idx = i
+                    break
+            t = transforms[idx]
+            x, y = t[0] * x + t[1] * y + t[4], t[2] * x + t[3] * y + t[5]
+            points[k, 0] = x
+            points[k, 1] = y
+        return count
+
+    rng = np.random.default_rng(0)
+    n_points = 10_000_000
+    points = np.empty((n_points, 2))
+    print(f"Wybor transformacji, {n_points} punktow, 1 watek:")
+    print(f"{'transformacje':>14} {'liniowo [s]':>12} {'aliasy [s]':>11} {'przyspieszenie':>15}")
+    for n_transforms in (2, 4, 10, 20):
+        # losowe kontrakcje o zbliżonych prawdopodobieństwach - najgorszy przypadek dla przeszukiwania
+        transforms = rng.uniform(-0.5, 0.5, (n_transforms, 6))
+        probabilities = rng.uniform(0.5, 1.0, n_transforms)
+        probabilities /= probabilities.sum()
+        cumsum_probs = np.cumsum(probabilities)
+        accept, alias = alias_table(probabilities)
+        linear_scan_stream(points, 1000, cumsum_probs, transforms, 0)
+        chaos_game_stream(points, 0, 1000, accept, alias, transforms, 0, np.inf, 0)
+
+        start = time.perf_counter()
+        linear_scan_stream(points, n_points, cumsum_probs, transforms, 1)
+        linear = time.perf_counter() - start
+        start = time.perf_counter()
+        chaos_game_stream(points, 0, n_points, accept, alias, transforms, 0, np.inf, 1)
+        walker = time.perf_counter() - start
+        print(f"{n_transforms:>14} {linear:>12.3f} {walker:>11.3f} {linear / walker:>14.2f}x")
+
+        # częstości wyborów zgodne z prawdopodobieństwami
+        picks = np.array([pick_transform(u, accept, alias) for u in rng.random(200_000) * n_transforms])
+        frequencies = np.bincount(picks, minlength=n_transforms) / len(picks)
+        if np.abs(frequencies - probabilities).max() > 0.01:
+            raise RuntimeError("Tablica aliasow nie odtwarza prawdopodobienstw.")
+
+    # tryb histogramu: pamięć stała (piksele) niezależnie od liczby próbek
+    from barnsley_fern import get_predefined_parameters
+
+    parameters = get_predefined_parameters()
+    probabilities = np.array(parameters['probabilities'])
+    transforms = np.array([[t['a'], t['b'], t['c'], t['d'], t['e'], t['f']] for t in parameters['transforms']])
+    width = height = 1000
+    chaos_game_density(1000, probabilities, transforms, 16, 16)
+    print(f"Histogram paproci {width}x{height} ({width * height * 8 / 2**20:.0f} MB na watek):")
+    for n_samples in (10_000_000, 100_000_000):
+        stats = {}
+        start = time.perf_counter()
+        chaos_game_density(n_samples, probabilities, transforms, width, height, seed=0, stats=stats)
+        elapsed = time.perf_counter() - start
+        points_mb = n_samples * 2 * 8 / 2**20
+        print(f"  {n_samples:>11} probek: {elapsed:6.2f} s ({n_samples / elapsed:,.0f} probek/s), "
+              f"tablica punktow zajelaby {points_mb:,.0f} MB")
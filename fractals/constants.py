@@ -8,4 +8,7 @@ VIEWPORT_WIDTH = 1500
 VIEWPORT_HEIGHT = 1100
 
 FRACTAL_CUSTOM_IFS = "Wlasny Fraktal IFS"
+FRACTAL_JULIA = "Zbior Julii"
+FRACTAL_ESCAPE_FORMULA = "Fraktale Czasu Ucieczki (Formuly)"
+FRACTAL_BUDDHABROT = "Buddhabrot"
 
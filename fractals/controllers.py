@@ -3,32 +3,71 @@ import time
 import traceback
 
 import dearpygui.dearpygui as dpg
+import numpy as np
 
-from barnsley_fern import barnsley_fern, get_predefined_parameters
+from barnsley_fern import barnsley_fern, barnsley_fern_density, get_predefined_parameters
+from buddhabrot import buddhabrot
 from constants import (
     DPG_CONTROL_GROUP,
     DPG_MANDELBROT_IMG_ID,
     DPG_PLOT,
     DPG_RIGHT_PANEL,
     DPG_STATUS_TEXT,
-    DPG_TEXTURE_TAG,
+    FRACTAL_BUDDHABROT,
     FRACTAL_CUSTOM_IFS,
+    FRACTAL_ESCAPE_FORMULA,
+    FRACTAL_JULIA,
 )
 from custom_fractal import CustomIFS
-from koch_snowflake import koch_snowflake_points
-from mandelbrot_set import mandelbrot_set as mandelbrot_set_numba
+from escape_formulas import FORMULAS, formula_set
+from julia_set import DEFAULT_JULIA_BOUNDS, julia_atlas, julia_set
+from koch_snowflake import koch_snowflake_points, koch_visible_segments
+from mandelbrot_antialias import DEFAULT_SUPERSAMPLING, antialias
+from mandelbrot_engine import default_thread_count
+from mandelbrot_set import PRECISION_AUTO, PRECISION_FLOAT32, PRECISION_FLOAT64, PRECISION_PERTURBATION, PRECISIONS
+from mandelbrot_tile_cache import TileCache
+from mandelbrot_viewport import MandelbrotViewport
 from renderers import (
+    DoubleBufferedTexture,
     _create_scatter_plot,
+    add_segment_series,
+    create_density_texture,
     create_line_theme,
     create_mandelbrot_texture,
     normalize_color,
+    polygon_segments,
 )
-from sierpinski_triangle import sierpinski_triangle_chaos_game, sierpinski_triangle_recursive
+from sierpinski_triangle import (
+    VERTEX_RULES,
+    regular_polygon,
+    sierpinski_triangle_chaos_game,
+    sierpinski_triangle_recursive,
+    sierpinski_visible_triangles,
+)
+
+# Leniwe generowanie wg widoku (Koch, Sierpiński): rozmiar wykresu w pikselach przyjmowany przed
+# pierwszą klatką i stan wykresu (osie, styl, zakres ostatnio wygenerowanego widoku)
+_LAZY_DEFAULT_PLOT_PIXELS = 1000
+_lazy_view = None
 
 # Event do anulowania generowania (prostsze niż flaga boolean)
 _generation_cancel_event = threading.Event()
 _generation_thread = None
 
+# Widok Mandelbrota pamięta ostatni obraz, więc przesunięcie/przybliżenie liczy tylko nowe piksele,
+# a pamięć podręczna kafelków - obszary oglądane wcześniej (także przy oddalaniu)
+_mandelbrot_viewport = MandelbrotViewport(tile_cache=TileCache())
+_mandelbrot_drag = None
+_MANDELBROT_ZOOM_STEP = 2.0
+# Zbiór Julii, atlas i fraktale z rejestru formuł renderowane są w tej samej rozdzielczości co Mandelbrot
+_JULIA_IMAGE_SIZE = 1000
+# Tekstura obrazów (Mandelbrot, Julia) tworzona raz - kolejne klatki podmieniają tylko bufory
+_image_texture = DoubleBufferedTexture()
+
+
+def _is_generating():
+    return _generation_thread is not None and _generation_thread.is_alive()
+
 
 def cancel_generation(_sender, _app_data):
     """Anuluje trwające generowanie fraktala."""
@@ -56,11 +95,14 @@ def render_contraction_report(group_tag, report_list, summary, is_ok):
     dpg.add_text(summary, parent=group_tag, color=summary_color, wrap=450)
 
 
-def _clear_previous_render():
+def _clear_previous_render(keep_image=False):
+    """Usuwa poprzedni wykres; obrazek (Mandelbrot, Julia) zostaje z keep_image=True (nowa klatka go podmieni)."""
+    global _lazy_view
+    _lazy_view = None
     if dpg.does_item_exist(DPG_PLOT):
         dpg.delete_item(DPG_PLOT)
-    if dpg.does_item_exist(DPG_MANDELBROT_IMG_ID):
-        dpg.delete_item(DPG_MANDELBROT_IMG_ID)
+    if not keep_image:
+        _image_texture.hide()
 
 
 def _normalize_probabilities(probabilities):
@@ -70,36 +112,310 @@ def _normalize_probabilities(probabilities):
     return [p / total_prob for p in probabilities]
 
 
+def _show_mandelbrot_image(mandelbrot_img, max_iter, fraction=None, antialias_bounds=None, antialias_stats=None):
+    """
+    Wyświetla macierz iteracji (z fraction - gładkie kolorowanie): koloruje ją wprost do bufora
+    tylnego tekstury i podmienia bufory - bez alokacji i bez odtwarzania obrazka.
+    Z antialias_bounds (zakres widoku) krawędzie są dodatkowo wygładzane supersamplingiem.
+    """
+    height, width = mandelbrot_img.shape
+    buffer = _image_texture.back_buffer(width, height)
+    create_mandelbrot_texture(mandelbrot_img, max_iter, fraction, out=buffer)
+    if antialias_bounds is not None:
+        antialias(
+            buffer, mandelbrot_img, antialias_bounds, max_iter, fraction,
+            should_cancel=lambda: _generation_cancel_event.is_set(), stats=antialias_stats,
+        )
+    _image_texture.present()
+
+
+def _show_density_image(density):
+    """Wyświetla raster gęstości (Buddhabrot) przez tę samą teksturę z podwójnym buforem co Mandelbrot."""
+    height, width = density.shape
+    create_density_texture(density, out=_image_texture.back_buffer(width, height))
+    _image_texture.present()
+
+
 def _render_mandelbrot():
     if _generation_cancel_event.is_set():
         return
     
-    xmin, xmax = -2.0, 1.0
-    ymin, ymax = -1.5, 1.5
     max_iter = dpg.get_value("mandel_max_iter")
-    width, height = 1000, 1000
+    n_threads = dpg.get_value("mandel_threads")
+    width, height = _mandelbrot_viewport.width, _mandelbrot_viewport.height
+    if dpg.get_value("mandel_auto_iter"):
+        dpg.set_value(DPG_STATUS_TEXT, "Szacowanie liczby iteracji (render probny)...")
+        max_iter = _mandelbrot_viewport.estimate_max_iter(
+            n_threads=n_threads, should_cancel=lambda: _generation_cancel_event.is_set(),
+        )
+        if max_iter is None:
+            return
+        dpg.set_value("mandel_max_iter", max_iter)
 
-    mandelbrot_img = mandelbrot_set_numba(xmin, xmax, ymin, ymax, width, height, max_iter)
+    def show_preview(preview, stride):
+        if _generation_cancel_event.is_set():
+            return
+        _show_mandelbrot_image(preview, max_iter)
+        dpg.set_value(DPG_STATUS_TEXT, f"Doprecyzowywanie obrazu (co {stride} piksel)...")
+
+    mandelbrot_img = _mandelbrot_viewport.render(
+        max_iter,
+        n_threads=n_threads,
+        should_cancel=lambda: _generation_cancel_event.is_set(),
+        precision=dpg.get_value("mandel_precision"),
+        on_pass=show_preview if dpg.get_value("mandel_progressive") else None,
+        subdivide=dpg.get_value("mandel_subdivide"),
+        interior_checks=dpg.get_value("mandel_interior_checks"),
+        smooth=dpg.get_value("mandel_smooth"),
+        preview=dpg.get_value("mandel_float32_preview"),
+    )
     
-    if _generation_cancel_event.is_set():
+    if _generation_cancel_event.is_set() or mandelbrot_img is None:
         _clear_previous_render()
         return
     
-    texture_data = create_mandelbrot_texture(mandelbrot_img, max_iter)
+    stats = _mandelbrot_viewport.last_stats
+    # próbki antyaliasingu liczone są w float64 - głębsze przybliżenia zostają bez wygładzania
+    antialias_bounds = None
+    if dpg.get_value("mandel_antialias") and stats["precision"] in (PRECISION_FLOAT32, PRECISION_FLOAT64):
+        antialias_bounds = _mandelbrot_viewport.bounds
+    antialias_stats = {}
+    _show_mandelbrot_image(
+        mandelbrot_img, max_iter, _mandelbrot_viewport.fraction, antialias_bounds, antialias_stats,
+    )
 
-    if dpg.does_item_exist(DPG_TEXTURE_TAG):
-        dpg.delete_item(DPG_TEXTURE_TAG)
+    reused_percent = 100.0 * _mandelbrot_viewport.last_reused / (width * height)
+    view_width = _mandelbrot_viewport.dx * (width - 1)
+    note = f"przepisano {reused_percent:.0f}% pikseli, {stats['precision']}, szerokosc {view_width:.2e}"
+    if dpg.get_value("mandel_auto_iter"):
+        note += f", max_iter (auto) {max_iter}"
+    if stats.get("resumed") is not None:
+        note += f", kontynuowano {stats['resumed']} pikseli od poprzedniego max_iter"
+    if stats["precision"] == PRECISION_PERTURBATION:
+        note += f", rebase: {stats.get('rebases', 0)}"
+    if stats.get("cardioid") or stats.get("periodic"):
+        note += f", wnetrze: kardioida {stats.get('cardioid', 0)}, okresowosc {stats.get('periodic', 0)}"
+    if stats.get("computed") is not None:
+        note += f", podzial prostokatow: iterowano {100.0 * stats['computed'] / (width * height):.0f}% pikseli"
+    if antialias_stats:
+        note += (
+            f", antyaliasing: {antialias_stats['edge_pixels']} pikseli krawedzi, "
+            f"{antialias_stats['extra_samples']} dodatkowych probek"
+        )
+    cache = _mandelbrot_viewport.tile_cache
+    if stats.get("cache_tiles") is not None:
+        note += (
+            f", pamiec podreczna: {stats['cache_tiles']} kafelkow, trafienia {cache.hit_rate:.0%}, "
+            f"{cache.memory_bytes / 2**20:.0f} MB"
+        )
+    return note
+
+
+def _render_julia():
+    if _generation_cancel_event.is_set():
+        return
 
-    with dpg.texture_registry(show=False):
-        dpg.add_raw_texture(
-            width,
-            height,
-            texture_data,
-            format=dpg.mvFormat_Float_rgba,  # type: ignore
-            tag=DPG_TEXTURE_TAG,
+    max_iter = dpg.get_value("julia_max_iter")
+    n_threads = dpg.get_value("julia_threads")
+    should_cancel = lambda: _generation_cancel_event.is_set()
+
+    if dpg.get_value("julia_atlas"):
+        grid = dpg.get_value("julia_atlas_grid")
+        thumb = _JULIA_IMAGE_SIZE // grid
+        dpg.set_value(DPG_STATUS_TEXT, f"Generowanie atlasu {grid}x{grid} zbiorow Julii...")
+        result = julia_atlas(grid, grid, thumb, thumb, max_iter, n_threads=n_threads, should_cancel=should_cancel)
+        julia_img = None if result is None else result[0]
+        note = f"atlas {grid}x{grid} = {grid * grid} zbiorow Julii {thumb}x{thumb}"
+    else:
+        c = complex(dpg.get_value("julia_c_re"), dpg.get_value("julia_c_im"))
+        julia_img = julia_set(
+            c, *DEFAULT_JULIA_BOUNDS, _JULIA_IMAGE_SIZE, _JULIA_IMAGE_SIZE, max_iter,
+            n_threads=n_threads, should_cancel=should_cancel,
         )
+        note = f"c = {c.real:.4f} {c.imag:+.4f}i"
+
+    if _generation_cancel_event.is_set() or julia_img is None:
+        _clear_previous_render()
+        return
+
+    _show_mandelbrot_image(julia_img, max_iter)
+    return note
+
+
+def _render_escape_formula():
+    if _generation_cancel_event.is_set():
+        return
+
+    name = dpg.get_value("formula_name")
+    max_iter = dpg.get_value("formula_max_iter")
+    power = dpg.get_value("formula_power") if FORMULAS[name].uses_power else None
+    dpg.set_value(DPG_STATUS_TEXT, f"Generowanie: {name}...")
+    formula_img = formula_set(
+        name, _JULIA_IMAGE_SIZE, _JULIA_IMAGE_SIZE, max_iter, power=power,
+        n_threads=dpg.get_value("formula_threads"),
+        should_cancel=lambda: _generation_cancel_event.is_set(),
+    )
+
+    if _generation_cancel_event.is_set() or formula_img is None:
+        _clear_previous_render()
+        return
+
+    _show_mandelbrot_image(formula_img, max_iter)
+    return name if power is None else f"{name}, d = {power}"
+
+
+def _render_buddhabrot():
+    if _generation_cancel_event.is_set():
+        return
+
+    n_samples = dpg.get_value("buddha_samples") * 1_000_000
+    dpg.set_value(DPG_STATUS_TEXT, f"Sledzenie orbit ({n_samples} probek c)...")
+    stats = {}
+    density = buddhabrot(
+        _JULIA_IMAGE_SIZE, _JULIA_IMAGE_SIZE, n_samples, dpg.get_value("buddha_max_iter"),
+        dpg.get_value("buddha_min_iter"), importance=dpg.get_value("buddha_importance"),
+        n_threads=dpg.get_value("buddha_threads"),
+        should_cancel=lambda: _generation_cancel_event.is_set(), stats=stats,
+    )
+
+    if _generation_cancel_event.is_set() or density is None:
+        _clear_previous_render()
+        return
+
+    _show_density_image(density)
+    return f"{stats['orbits']} orbit w obrazie ({stats['orbits'] / n_samples:.0%} probek)"
+
+
+def _hovered_mandelbrot_pixel():
+    """Zwraca (kolumna, wiersz) macierzy iteracji pod kursorem albo None."""
+    if dpg.get_value("fractal_selector") != "Zbior Mandelbrota":
+        return None
+    if not dpg.does_item_exist(DPG_MANDELBROT_IMG_ID) or not dpg.is_item_hovered(DPG_MANDELBROT_IMG_ID):
+        return None
+
+    mouse_x, mouse_y = dpg.get_mouse_pos(local=False)
+    image_x, image_y = dpg.get_item_rect_min(DPG_MANDELBROT_IMG_ID)
+    col = int(mouse_x - image_x)
+    # tekstura jest odwrócona w pionie (wiersz 0 macierzy = dół obrazu)
+    row = _mandelbrot_viewport.height - 1 - int(mouse_y - image_y)
+    if not (0 <= col < _mandelbrot_viewport.width and 0 <= row < _mandelbrot_viewport.height):
+        return None
+    return col, row
+
+
+def _on_mandelbrot_wheel(_sender, app_data):
+    if _is_generating():
+        return
+    pixel = _hovered_mandelbrot_pixel()
+    if pixel is None:
+        return
+    factor = _MANDELBROT_ZOOM_STEP if app_data > 0 else 1.0 / _MANDELBROT_ZOOM_STEP
+    _mandelbrot_viewport.zoom(factor, *pixel)
+    generate_and_plot(None, None)
+
+
+def _on_mandelbrot_click(_sender, _app_data):
+    global _mandelbrot_drag
+    _mandelbrot_drag = [0.0, 0.0] if _hovered_mandelbrot_pixel() is not None else None
+
 
-    dpg.add_image(DPG_TEXTURE_TAG, width=width, height=height, tag=DPG_MANDELBROT_IMG_ID, parent=DPG_RIGHT_PANEL)
+def _on_mandelbrot_drag(_sender, app_data):
+    if _mandelbrot_drag is not None:
+        _mandelbrot_drag[0], _mandelbrot_drag[1] = app_data[1], app_data[2]
+
+
+def _on_mandelbrot_release(_sender, _app_data):
+    global _mandelbrot_drag
+    drag, _mandelbrot_drag = _mandelbrot_drag, None
+    if drag is None or _is_generating():
+        return
+    d_cols, d_rows = -round(drag[0]), round(drag[1])
+    if d_cols == 0 and d_rows == 0:
+        return
+    # obraz "idzie za kursorem", więc widok przesuwa się w przeciwną stronę
+    _mandelbrot_viewport.pan(d_cols, d_rows)
+    generate_and_plot(None, None)
+
+
+def reset_mandelbrot_view(_sender, _app_data):
+    if _is_generating():
+        return
+    _mandelbrot_viewport.reset()
+    generate_and_plot(None, None)
+
+
+def register_mandelbrot_handlers():
+    """Rejestruje obsługę myszy: kółko przybliża/oddala, przeciąganie przesuwa widok."""
+    with dpg.handler_registry():
+        dpg.add_mouse_wheel_handler(callback=_on_mandelbrot_wheel)
+        dpg.add_mouse_click_handler(button=dpg.mvMouseButton_Left, callback=_on_mandelbrot_click)
+        dpg.add_mouse_drag_handler(button=dpg.mvMouseButton_Left, callback=_on_mandelbrot_drag)
+        dpg.add_mouse_release_handler(button=dpg.mvMouseButton_Left, callback=_on_mandelbrot_release)
+
+
+def _lazy_segments(fractal_type, pixel_size, bounds):
+    """Odcinki widocznej części płatka Kocha albo trójkąta Sierpińskiego (None - przerwano)."""
+    should_cancel = lambda: _generation_cancel_event.is_set()
+    if fractal_type == "Platek Sniegu Kocha":
+        return koch_visible_segments(pixel_size, bounds, should_cancel=should_cancel)
+    triangles = sierpinski_visible_triangles(pixel_size, bounds, should_cancel)
+    return None if triangles is None else polygon_segments(triangles)
+
+
+def _render_lazy_view(fractal_type, label, color_tag, width_tag, theme_prefix):
+    """
+    Leniwy tryb Kocha/Sierpińskiego: rysuje całą figurę z dokładnością do piksela, a po każdym
+    przybliżeniu/przesunięciu (_on_lazy_view_input) generuje od nowa tylko widoczną część.
+    """
+    global _lazy_view
+    dpg.set_value(DPG_STATUS_TEXT, "Generowanie widocznej czesci figury...")
+    segments = _lazy_segments(fractal_type, 1.0 / _LAZY_DEFAULT_PLOT_PIXELS, None)
+    if _generation_cancel_event.is_set() or segments is None:
+        _clear_previous_render()
+        return None
+
+    dpg.add_plot(label=label, height=-1, width=-1, tag=DPG_PLOT, parent=DPG_RIGHT_PANEL, equal_aspects=True)
+    primary_x = dpg.add_plot_axis(dpg.mvXAxis, label="X", parent=DPG_PLOT)
+    primary_y = dpg.add_plot_axis(dpg.mvYAxis, label="Y", parent=DPG_PLOT)
+    style = (normalize_color(dpg.get_value(color_tag)), dpg.get_value(width_tag), theme_prefix)
+    add_segment_series(segments, primary_y, *style)
+    dpg.fit_axis_data(primary_x)
+    dpg.fit_axis_data(primary_y)
+
+    _lazy_view = {"fractal": fractal_type, "x_axis": primary_x, "y_axis": primary_y, "style": style, "bounds": None}
+    return f"{len(segments) // 2} odcinkow; przyblizenie generuje tylko widoczna czesc"
+
+
+def _on_lazy_view_input(_sender, _app_data):
+    view = _lazy_view
+    if view is None or _is_generating() or not dpg.does_item_exist(view["y_axis"]):
+        return
+    if dpg.get_value("fractal_selector") != view["fractal"]:
+        return
+    # ImPlot zmienia zakres osi w trakcie klatki - czytamy go dopiero po niej
+    dpg.split_frame()
+    xmin, xmax = dpg.get_axis_limits(view["x_axis"])
+    ymin, ymax = dpg.get_axis_limits(view["y_axis"])
+    bounds = (xmin, xmax, ymin, ymax)
+    if bounds == view["bounds"] or xmax <= xmin or ymax <= ymin:
+        return
+    view["bounds"] = bounds
+
+    width, height = dpg.get_item_rect_size(DPG_PLOT)
+    pixel_size = max((xmax - xmin) / max(width, 1), (ymax - ymin) / max(height, 1))
+    segments = _lazy_segments(view["fractal"], pixel_size, bounds)
+    if segments is None or view is not _lazy_view:
+        return
+    dpg.delete_item(view["y_axis"], children_only=True, slot=1)
+    add_segment_series(segments, view["y_axis"], *view["style"])
+    dpg.set_value(DPG_STATUS_TEXT, f"Widok: {len(segments) // 2} odcinkow (rozmiar piksela {pixel_size:.3g})")
+
+
+def register_lazy_view_handlers():
+    """Po przybliżeniu kółkiem lub przesunięciu/zaznaczeniu myszą leniwy widok generuje się od nowa."""
+    with dpg.handler_registry():
+        dpg.add_mouse_wheel_handler(callback=_on_lazy_view_input)
+        dpg.add_mouse_release_handler(callback=_on_lazy_view_input)
 
 
 def _read_barnsley_inputs():
@@ -165,16 +481,37 @@ def _render_barnsley():
         print("Ostrzezenie: Paproc Barnsleya nie spelnia warunku kontrakcji.")
         dpg.set_value(DPG_STATUS_TEXT, "Ostrzezenie: kontrakcja niespelniona – generuje mimo to...")
 
+    if dpg.get_value("barnsley_density"):
+        n_samples = dpg.get_value("barnsley_density_samples") * 1_000_000
+        dpg.set_value(DPG_STATUS_TEXT, f"Zliczanie {n_samples} punktow do histogramu...")
+        density = barnsley_fern_density(
+            n_samples, barnsley_params, _JULIA_IMAGE_SIZE, _JULIA_IMAGE_SIZE,
+            n_threads=dpg.get_value("barnsley_threads"), should_cancel=lambda: _generation_cancel_event.is_set(),
+        )
+        return _show_ifs_density(density, n_samples)
+
     dpg.set_value(DPG_STATUS_TEXT, f"Generowanie {n_points} punktow...")
-    points = barnsley_fern(n_points, barnsley_params)
+    points = barnsley_fern(
+        n_points, barnsley_params, n_threads=dpg.get_value("barnsley_threads"),
+        should_cancel=lambda: _generation_cancel_event.is_set(),
+    )
     
-    if _generation_cancel_event.is_set():
+    if _generation_cancel_event.is_set() or points is None:
         _clear_previous_render()
         return
     
     _create_scatter_plot(points, n_points, "Paproc Barnsleya", "barnsley_color", "barnsley_size", "barnsley_theme")
 
 
+def _show_ifs_density(density, n_samples):
+    """Pokazuje histogram gęstości IFS jako teksturę (skala logarytmiczna) i zwraca notatkę do statusu."""
+    if _generation_cancel_event.is_set() or density is None:
+        _clear_previous_render()
+        return None
+    _show_density_image(density)
+    return f"histogram z {n_samples} punktow"
+
+
 def _render_sierpinski_chaos():
     if _generation_cancel_event.is_set():
         return
@@ -184,10 +521,17 @@ def _render_sierpinski_chaos():
         dpg.set_value(DPG_STATUS_TEXT, f"Generowanie {n_points} punktow... (moze to chwile potrwac)")
         n_points = 2000000
 
+    n_vertices = dpg.get_value("sierpinski_chaos_vertices")
+    # trójkąt zostaje w klasycznym położeniu, pozostałe wielokąty są foremne
+    vertices = None if n_vertices == 3 else regular_polygon(n_vertices)
     dpg.set_value(DPG_STATUS_TEXT, f"Generowanie {n_points} punktow...")
-    points = sierpinski_triangle_chaos_game(n_points)
+    points = sierpinski_triangle_chaos_game(
+        n_points, vertices, dpg.get_value("sierpinski_chaos_ratio"),
+        VERTEX_RULES[dpg.get_value("sierpinski_chaos_rule")], n_threads=dpg.get_value("sierpinski_chaos_threads"),
+        should_cancel=lambda: _generation_cancel_event.is_set(),
+    )
     
-    if _generation_cancel_event.is_set():
+    if _generation_cancel_event.is_set() or points is None:
         _clear_previous_render()
         return
     
@@ -205,6 +549,11 @@ def _render_koch():
     if _generation_cancel_event.is_set():
         return
     
+    if dpg.get_value("koch_lazy"):
+        return _render_lazy_view(
+            "Platek Sniegu Kocha", "Platek Sniegu Kocha (widok)", "koch_color", "koch_line_width", "koch_theme",
+        )
+
     order = dpg.get_value("koch_order")
     dpg.set_value(DPG_STATUS_TEXT, f"Generowanie platka Kocha (poziom {order})...")
 
@@ -218,8 +567,9 @@ def _render_koch():
     if points.ndim != 2 or points.shape[1] != 2:
         raise ValueError(f"Nieprawidlowy ksztalt danych: {points.shape}, oczekiwano (n, 2)")
 
-    x_data = points[:, 0].tolist()
-    y_data = points[:, 1].tolist()
+    # tablice NumPy trafiają do DearPyGui bez konwersji na listy
+    x_data = np.ascontiguousarray(points[:, 0])
+    y_data = np.ascontiguousarray(points[:, 1])
 
     dpg.add_plot(
         label=f"Platek Sniegu Kocha (Poziom {order})",
@@ -247,6 +597,12 @@ def _render_sierpinski_recursive():
     if _generation_cancel_event.is_set():
         return
     
+    if dpg.get_value("sierpinski_lazy"):
+        return _render_lazy_view(
+            "Trojkat Sierpinskiego (Rekurencyjnie)", "Trojkat Sierpinskiego (widok)", "sierpinski_recursive_color",
+            "sierpinski_recursive_size", "sierpinski_recursive_line_theme",
+        )
+
     dpg.set_value(DPG_STATUS_TEXT, f"Generowanie trojkatow (poziom {n})...")
     triangles = sierpinski_triangle_recursive(n, lambda: _generation_cancel_event.is_set())
     
@@ -267,18 +623,10 @@ def _render_sierpinski_recursive():
 
     color = normalize_color(dpg.get_value("sierpinski_recursive_color"))
     line_width = dpg.get_value("sierpinski_recursive_size")
-    
-    for i, triangle in enumerate(triangles):
-        if _generation_cancel_event.is_set():
-            _clear_previous_render()
-            return
-        
-        v0, v1, v2 = triangle[0], triangle[1], triangle[2]
-        x_line = [v0[0], v1[0], v2[0], v0[0]]
-        y_line = [v0[1], v1[1], v2[1], v0[1]]
-
-        line_tag = dpg.add_line_series(x_line, y_line, parent=primary_y)
-        create_line_theme(line_tag, color, line_width, "sierpinski_recursive_line_theme")
+    dpg.set_value(DPG_STATUS_TEXT, f"Przygotowywanie wykresu ({len(triangles)} trojkatow)...")
+    add_segment_series(
+        polygon_segments(triangles), primary_y, color, line_width, "sierpinski_recursive_line_theme",
+    )
 
     dpg.fit_axis_data(primary_x)
     dpg.fit_axis_data(primary_y)
@@ -307,9 +655,21 @@ def _render_custom_ifs():
         print("Ostrzezenie: Generowany IFS moze nie byc kontrakcja.")
         dpg.set_value(DPG_STATUS_TEXT, "Ostrzezenie: kontrakcja niespelniona – generuje mimo to...")
 
-    points = ifs.generate(n_points)
+    if dpg.get_value("custom_density"):
+        n_samples = dpg.get_value("custom_density_samples") * 1_000_000
+        dpg.set_value(DPG_STATUS_TEXT, f"Zliczanie {n_samples} punktow do histogramu...")
+        density = ifs.density(
+            n_samples, _JULIA_IMAGE_SIZE, _JULIA_IMAGE_SIZE, n_threads=dpg.get_value("custom_threads"),
+            should_cancel=lambda: _generation_cancel_event.is_set(),
+        )
+        return _show_ifs_density(density, n_samples)
+
+    points = ifs.generate(
+        n_points, n_threads=dpg.get_value("custom_threads"),
+        should_cancel=lambda: _generation_cancel_event.is_set(),
+    )
     
-    if _generation_cancel_event.is_set():
+    if _generation_cancel_event.is_set() or points is None:
         _clear_previous_render()
         return
 
@@ -330,6 +690,9 @@ def _render_custom_ifs():
 
 _FRACTAL_HANDLERS = {
     "Zbior Mandelbrota": _render_mandelbrot,
+    FRACTAL_JULIA: _render_julia,
+    FRACTAL_ESCAPE_FORMULA: _render_escape_formula,
+    FRACTAL_BUDDHABROT: _render_buddhabrot,
     "Paproc Barnsleya": _render_barnsley,
     "Trojkat Sierpinskiego (Chaos Game)": _render_sierpinski_chaos,
     "Platek Sniegu Kocha": _render_koch,
@@ -349,14 +712,18 @@ def _generate_in_thread(fractal_type, start_time):
             dpg.set_value(DPG_STATUS_TEXT, "Generowanie anulowane.")
             return
         
-        handler()
+        # handler może zwrócić krótką notatkę (np. statystyki silnika) dopisywaną do statusu
+        note = handler()
         
         if _generation_cancel_event.is_set():
             dpg.set_value(DPG_STATUS_TEXT, "Generowanie anulowane.")
             return
 
         elapsed = time.time() - start_time
-        dpg.set_value(DPG_STATUS_TEXT, f"Wygenerowano w: {elapsed:.3f} s")
+        status = f"Wygenerowano w: {elapsed:.3f} s"
+        if note:
+            status += f" ({note})"
+        dpg.set_value(DPG_STATUS_TEXT, status)
     except Exception as e:
         if not _generation_cancel_event.is_set():
             error_msg = f"Blad Generowania: {e}"
@@ -371,10 +738,18 @@ def _generate_in_thread(fractal_type, start_time):
         _generation_cancel_event.clear()
 
 
+def _shows_image(fractal_type):
+    """True dla fraktali rysowanych jako obrazek (tekstura), a nie wykres."""
+    if fractal_type in ("Zbior Mandelbrota", FRACTAL_JULIA, FRACTAL_ESCAPE_FORMULA, FRACTAL_BUDDHABROT):
+        return True
+    density_tag = {"Paproc Barnsleya": "barnsley_density", FRACTAL_CUSTOM_IFS: "custom_density"}.get(fractal_type)
+    return density_tag is not None and dpg.does_item_exist(density_tag) and dpg.get_value(density_tag)
+
+
 def generate_and_plot(_sender, _app_data):
     global _generation_thread
     
-    if _generation_thread is not None and _generation_thread.is_alive():
+    if _is_generating():
         return
     
     _generation_cancel_event.clear()
@@ -382,7 +757,7 @@ def generate_and_plot(_sender, _app_data):
     fractal_type = dpg.get_value("fractal_selector")
     start_time = time.time()
 
-    _clear_previous_render()
+    _clear_previous_render(keep_image=_shows_image(fractal_type))
     dpg.set_value(DPG_STATUS_TEXT, "Generowanie... Czekaj.")
     
     if dpg.does_item_exist("cancel_button"):
@@ -579,6 +954,196 @@ def update_controls(_sender, app_data):
             step=10,
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_checkbox(
+            label="Automatyczne Max Iteracji (przyblizenie + render probny)",
+            default_value=True,
+            tag="mandel_auto_iter",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="mandel_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_combo(
+            label="Precyzja",
+            items=list(PRECISIONS),
+            default_value=PRECISION_AUTO,
+            tag="mandel_precision",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Renderowanie progresywne",
+            default_value=True,
+            tag="mandel_progressive",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Podzial prostokatow (Mariani-Silver)",
+            default_value=False,
+            tag="mandel_subdivide",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Skroty dla wnetrza (kardioida/okresowosc)",
+            default_value=True,
+            tag="mandel_interior_checks",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Gladkie kolorowanie",
+            default_value=True,
+            tag="mandel_smooth",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Szybki podglad float32 (plytkie widoki, precyzja auto)",
+            default_value=False,
+            tag="mandel_float32_preview",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label=f"Antyaliasing krawedzi ({DEFAULT_SUPERSAMPLING}x{DEFAULT_SUPERSAMPLING} probek)",
+            default_value=False,
+            tag="mandel_antialias",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_text("Kolko myszy: przyblizenie, przeciaganie: przesuniecie", parent=DPG_CONTROL_GROUP)
+        dpg.add_button(
+            label="Resetuj Widok",
+            callback=reset_mandelbrot_view,
+            parent=DPG_CONTROL_GROUP,
+            width=-1,
+        )
+
+    elif app_data == FRACTAL_JULIA:
+        dpg.add_input_int(
+            label="Max Iteracji",
+            default_value=300,
+            min_value=10,
+            tag="julia_max_iter",
+            step=10,
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="julia_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_float(
+            label="c (czesc rzeczywista)",
+            default_value=-0.8,
+            step=0.01,
+            format="%.4f",
+            tag="julia_c_re",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_float(
+            label="c (czesc urojona)",
+            default_value=0.156,
+            step=0.01,
+            format="%.4f",
+            tag="julia_c_im",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_separator(parent=DPG_CONTROL_GROUP)
+        dpg.add_checkbox(
+            label="Atlas Mandelbrota-Julii (siatka parametrow c)",
+            default_value=False,
+            tag="julia_atlas",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Miniatur na bok",
+            default_value=20,
+            min_value=2,
+            max_value=100,
+            min_clamped=True,
+            max_clamped=True,
+            tag="julia_atlas_grid",
+            parent=DPG_CONTROL_GROUP,
+        )
+
+    elif app_data == FRACTAL_ESCAPE_FORMULA:
+        dpg.add_combo(
+            label="Formula",
+            items=list(FORMULAS),
+            default_value="Burning Ship",
+            tag="formula_name",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Stopien d (Multibrot, Newton)",
+            default_value=3,
+            min_value=2,
+            max_value=12,
+            min_clamped=True,
+            max_clamped=True,
+            tag="formula_power",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Max Iteracji",
+            default_value=200,
+            min_value=10,
+            tag="formula_max_iter",
+            step=10,
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="formula_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+
+    elif app_data == FRACTAL_BUDDHABROT:
+        dpg.add_input_int(
+            label="Probki c (miliony)",
+            default_value=10,
+            min_value=1,
+            min_clamped=True,
+            tag="buddha_samples",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Max Iteracji",
+            default_value=1000,
+            min_value=10,
+            tag="buddha_max_iter",
+            step=100,
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Min Iteracji (krotsze orbity pomijane)",
+            default_value=20,
+            min_value=0,
+            min_clamped=True,
+            tag="buddha_min_iter",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="buddha_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Losowanie wg mapy waznosci (brzeg zbioru)",
+            default_value=True,
+            tag="buddha_importance",
+            parent=DPG_CONTROL_GROUP,
+        )
 
     elif app_data == "Paproc Barnsleya":
         dpg.add_input_int(
@@ -589,6 +1154,28 @@ def update_controls(_sender, app_data):
             step=1000,
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="barnsley_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Histogram gestosci (bez zapisu punktow)",
+            default_value=False,
+            tag="barnsley_density",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Punkty histogramu (miliony)",
+            default_value=100,
+            min_value=1,
+            min_clamped=True,
+            tag="barnsley_density_samples",
+            parent=DPG_CONTROL_GROUP,
+        )
         dpg.add_separator(parent=DPG_CONTROL_GROUP)
 
         dpg.add_button(
@@ -668,6 +1255,40 @@ def update_controls(_sender, app_data):
             step=10000,
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_input_int(
+            label="Liczba Wierzcholkow",
+            default_value=3,
+            min_value=3,
+            max_value=12,
+            min_clamped=True,
+            max_clamped=True,
+            tag="sierpinski_chaos_vertices",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_slider_float(
+            label="Wspolczynnik skoku",
+            default_value=0.5,
+            min_value=0.05,
+            max_value=0.95,
+            tag="sierpinski_chaos_ratio",
+            parent=DPG_CONTROL_GROUP,
+            width=-1,
+        )
+        dpg.add_combo(
+            label="Wybor wierzcholka",
+            items=list(VERTEX_RULES),
+            default_value=next(iter(VERTEX_RULES)),
+            tag="sierpinski_chaos_rule",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="sierpinski_chaos_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
         dpg.add_separator(parent=DPG_CONTROL_GROUP)
         dpg.add_text("Wizualizacja:", parent=DPG_CONTROL_GROUP)
         dpg.add_color_edit(
@@ -693,10 +1314,16 @@ def update_controls(_sender, app_data):
             label="Poziom Rekursji",
             default_value=4,
             min_value=1,
-            max_value=8,
+            max_value=12,
             tag="sierpinski_n",
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_checkbox(
+            label="Leniwie wg widoku (dowolne przyblizenie)",
+            default_value=False,
+            tag="sierpinski_lazy",
+            parent=DPG_CONTROL_GROUP,
+        )
         dpg.add_separator(parent=DPG_CONTROL_GROUP)
         dpg.add_text("Wizualizacja:", parent=DPG_CONTROL_GROUP)
         dpg.add_color_edit(
@@ -722,10 +1349,16 @@ def update_controls(_sender, app_data):
             label="Poziom rekursji",
             default_value=4,
             min_value=0,
-            max_value=7,
+            max_value=10,
             tag="koch_order",
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_checkbox(
+            label="Leniwie wg widoku (dowolne przyblizenie)",
+            default_value=False,
+            tag="koch_lazy",
+            parent=DPG_CONTROL_GROUP,
+        )
         dpg.add_separator(parent=DPG_CONTROL_GROUP)
         dpg.add_text("Wizualizacja:", parent=DPG_CONTROL_GROUP)
         dpg.add_color_edit(
@@ -755,6 +1388,28 @@ def update_controls(_sender, app_data):
             step=1000,
             parent=DPG_CONTROL_GROUP,
         )
+        dpg.add_input_int(
+            label="Liczba Watkow",
+            default_value=default_thread_count(),
+            min_value=1,
+            min_clamped=True,
+            tag="custom_threads",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_checkbox(
+            label="Histogram gestosci (bez zapisu punktow)",
+            default_value=False,
+            tag="custom_density",
+            parent=DPG_CONTROL_GROUP,
+        )
+        dpg.add_input_int(
+            label="Punkty histogramu (miliony)",
+            default_value=100,
+            min_value=1,
+            min_clamped=True,
+            tag="custom_density_samples",
+            parent=DPG_CONTROL_GROUP,
+        )
         dpg.add_separator(parent=DPG_CONTROL_GROUP)
         
         dpg.add_text("Konfiguracja IFS:", parent=DPG_CONTROL_GROUP)
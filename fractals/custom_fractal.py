@@ -1,5 +1,10 @@
 import numpy as np
-from numba import jit
+
+from chaos_game import chaos_game, chaos_game_density
+
+# Punkty, które "uciekły" zbyt daleko, są pomijane - żeby nie skalować wykresu do dużych wartości
+POINT_LIMIT = 10000.0
+
 
 class CustomIFS:
     """
@@ -64,13 +69,42 @@ class CustomIFS:
 
         return is_fractal_guaranteed, report_list, final_msg
 
-    def generate(self, n_points=100000):
+    def generate(self, n_points=100000, seed=None, n_threads=None, should_cancel=None):
         """
-        Generuje punkty fraktala metodą Chaos Game.
+        Generuje punkty fraktala metodą Chaos Game - niezależnymi strumieniami na wielu
+        wątkach (chaos_game()); ten sam seed daje te same punkty niezależnie od liczby wątków.
+
+        Returns:
+            numpy array (n, 2) z punktami lub None jeśli przerwano
         """
         if not self.transforms:
             return np.array([])
 
+        probs, transforms_array = self._arrays()
+        return chaos_game(
+            n_points, probs, transforms_array, POINT_LIMIT, seed=seed, n_threads=n_threads,
+            should_cancel=should_cancel,
+        )
+
+    def density(self, n_samples, width, height, seed=None, n_threads=None, should_cancel=None, stats=None):
+        """
+        Histogram gęstości fraktala (height, width) z n_samples kroków Chaos Game bez zapisywania
+        punktów (chaos_game_density()) - pamięć nie zależy od liczby próbek.
+
+        Returns:
+            histogram float64 liczby trafień (wiersz 0 = dół) lub None jeśli przerwano
+        """
+        if not self.transforms:
+            raise ValueError("Brak zdefiniowanych transformacji.")
+
+        probs, transforms_array = self._arrays()
+        return chaos_game_density(
+            n_samples, probs, transforms_array, width, height, limit=POINT_LIMIT, seed=seed,
+            n_threads=n_threads, should_cancel=should_cancel, stats=stats,
+        )
+
+    def _arrays(self):
+        """Znormalizowane prawdopodobieństwa i tablica współczynników (liczba transformacji x 6)."""
         probs = np.array(self.probabilities, dtype=np.float64)
 
         if len(probs) != len(self.transforms):
@@ -87,60 +121,7 @@ class CustomIFS:
         for i, t in enumerate(self.transforms):
             transforms_array[i] = [t['a'], t['b'], t['c'], t['d'], t['e'], t['f']]
 
-        return _generate_ifs_numba(n_points, probs, transforms_array)
-
-@jit(nopython=True)
-def _generate_ifs_numba(n_points, probabilities, transforms):
-    """
-    Implementacja Chaos Game używająca Numba.
-    """
-    cumsum_probs = np.cumsum(probabilities)
-    points = np.zeros((n_points, 2), dtype=np.float64)
-    valid_count = 0
-    limit = 10000.0
-    
-    x, y = 0.0, 0.0
-    
-    for _ in range(100):
-        r = np.random.rand()
-        idx = 0
-        for i in range(len(cumsum_probs)):
-            if r <= cumsum_probs[i]:
-                idx = i
-                break
-        
-        t = transforms[idx]
-        nx = t[0] * x + t[1] * y + t[4]
-        ny = t[2] * x + t[3] * y + t[5]
-        x, y = nx, ny
-
-
-    for k in range(n_points):
-        r = np.random.rand()
-        idx = 0
-        for i in range(len(cumsum_probs)):
-            if r <= cumsum_probs[i]:
-                idx = i
-                break
-        
-        t = transforms[idx]
-        # x' = ax + by + e
-        # y' = cx + dy + f
-        nx = t[0] * x + t[1] * y + t[4]
-        ny = t[2] * x + t[3] * y + t[5]
-        
-        x, y = nx, ny
-        
-        # Filtrowanie punktów, które "uciekły" zbyt daleko - żeby nie skalować wykresu do dużych wartości
-        if abs(x) < limit and abs(y) < limit:
-            points[valid_count, 0] = x
-            points[valid_count, 1] = y
-            valid_count += 1
-        
-        if abs(x) > 1e15 or abs(y) > 1e15:
-            x, y = 0.0, 0.0
-        
-    return points[:valid_count]
+        return probs, transforms_array
 
 
 if __name__ == "__main__":
@@ -0,0 +1,254 @@
+import numpy as np
+from numba import jit
+
+from mandelbrot_engine import DEFAULT_TILE_SIZE, run_tiles
+
+# Identyfikatory formuł - każdy ma własny kernel w FORMULA_KERNELS
+FORMULA_MANDELBROT = 0
+FORMULA_BURNING_SHIP = 1
+FORMULA_MULTIBROT = 2
+FORMULA_TRICORN = 3
+FORMULA_NEWTON = 4
+
+ESCAPE_RADIUS_SQ = 4.0
+# Metoda Newtona kończy, gdy |z^d - 1|^2 spadnie poniżej tej wartości (punkt trafił w pierwiastek)
+NEWTON_TOLERANCE_SQ = 1e-12
+
+
+# --- Definicje formuł: krok iteracji (x, y) -> (x', y') dla c = cr + ci*i i stopnia power.
+# Jedna mała funkcja na formułę; formula_tile() zawiera wspólną pętlę.
+
+@jit(nopython=True, nogil=True, cache=True)
+def mandelbrot_step(x, y, cr, ci, power):
+    return x * x - y * y + cr, 2.0 * x * y + ci
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def burning_ship_step(x, y, cr, ci, power):
+    """z -> (|Re z| + i|Im z|)^2 + c"""
+    x = abs(x)
+    y = abs(y)
+    return x * x - y * y + cr, 2.0 * x * y + ci
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _complex_power(x, y, power):
+    """(x + iy)^power dla całkowitego power >= 1 przez mnożenie - bez exp/log"""
+    zx = x
+    zy = y
+    for _ in range(power - 1):
+        zx, zy = zx * x - zy * y, zx * y + zy * x
+    return zx, zy
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def multibrot_step(x, y, cr, ci, power):
+    """z -> z^power + c"""
+    zx, zy = _complex_power(x, y, power)
+    return zx + cr, zy + ci
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def tricorn_step(x, y, cr, ci, power):
+    """z -> conj(z)^2 + c"""
+    return x * x - y * y + cr, -2.0 * x * y + ci
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def newton_step(x, y, cr, ci, power):
+    """
+    Krok metody Newtona dla z^power - 1 (c nie występuje - piksel to punkt startowy).
+    Przy zerowej pochodnej (z = 0 albo z^(power-1) poniżej zakresu double) krok jest niewykonalny -
+    zwraca NaN, a formula_tile() traktuje piksel jak niezbieżny.
+    """
+    px, py = _complex_power(x, y, power - 1)
+    if px == 0.0 and py == 0.0:
+        return np.nan, np.nan
+    z = complex(x, y)
+    z_pow = complex(px, py)
+    z = z - (z_pow * z - 1.0) / (power * z_pow)
+    return z.real, z.imag
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _newton_converged(x, y, power):
+    px, py = _complex_power(x, y, power)
+    px -= 1.0
+    return px * px + py * py < NEWTON_TOLERANCE_SQ
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _formula_step(formula, x, y, cr, ci, power):
+    # formula jest stałą w kernelu formuły (formula_tile wstawiana inline), więc zostaje jedna gałąź
+    if formula == FORMULA_BURNING_SHIP:
+        return burning_ship_step(x, y, cr, ci, power)
+    if formula == FORMULA_MULTIBROT:
+        return multibrot_step(x, y, cr, ci, power)
+    if formula == FORMULA_TRICORN:
+        return tricorn_step(x, y, cr, ci, power)
+    if formula == FORMULA_NEWTON:
+        return newton_step(x, y, cr, ci, power)
+    return mandelbrot_step(x, y, cr, ci, power)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def _formula_done(formula, x, y, power):
+    if formula == FORMULA_NEWTON:
+        return _newton_converged(x, y, power)
+    return x * x + y * y > ESCAPE_RADIUS_SQ
+
+
+@jit(nopython=True, nogil=True, cache=True, inline="always")
+def formula_tile(formula, mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    """
+    Wspólna pętla czasu ucieczki dla wszystkich formuł - kafelek jak w mandelbrot_tile().
+    Wołana tylko z kerneli poszczególnych formuł (poniżej) ze stałą formula: inline="always"
+    wstawia pętlę w kernel, więc gałęzie zależne od formuły są rozstrzygane w czasie kompilacji
+    i pętla jest tak szybka jak pisana ręcznie.
+    Newton startuje z piksela i liczy kroki do zbieżności; pozostałe formuły startują z z = 0.
+    """
+    for i in range(row0, row1):
+        for j in range(col0, col1):
+            cr = r1[j]
+            ci = r2[i]
+            if formula == FORMULA_NEWTON:
+                x, y = cr, ci
+            else:
+                x, y = 0.0, 0.0
+            n = 0
+            while n < max_iter and not _formula_done(formula, x, y, power):
+                x, y = _formula_step(formula, x, y, cr, ci, power)
+                n += 1
+                if formula == FORMULA_NEWTON and np.isnan(x):
+                    n = max_iter
+                    break
+            mset[i, j] = n
+
+
+# --- Kernele formuł: osobna funkcja na poziomie modułu dla każdej formuły, żeby cache=True
+# zapisywał na dysku skompilowaną wersję każdej z nich (domknięcia z fabryki nie są cache'owane).
+
+@jit(nopython=True, nogil=True, cache=True)
+def mandelbrot_formula_tile(mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    formula_tile(FORMULA_MANDELBROT, mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def burning_ship_formula_tile(mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    formula_tile(FORMULA_BURNING_SHIP, mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def multibrot_formula_tile(mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    formula_tile(FORMULA_MULTIBROT, mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def tricorn_formula_tile(mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    formula_tile(FORMULA_TRICORN, mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+
+@jit(nopython=True, nogil=True, cache=True)
+def newton_formula_tile(mset, r1, r2, power, row0, row1, col0, col1, max_iter):
+    formula_tile(FORMULA_NEWTON, mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+
+FORMULA_KERNELS = {
+    FORMULA_MANDELBROT: mandelbrot_formula_tile,
+    FORMULA_BURNING_SHIP: burning_ship_formula_tile,
+    FORMULA_MULTIBROT: multibrot_formula_tile,
+    FORMULA_TRICORN: tricorn_formula_tile,
+    FORMULA_NEWTON: newton_formula_tile,
+}
+
+
+class EscapeFormula:
+    """Wpis rejestru formuł: identyfikator kernela, domyślny widok i stopień."""
+    def __init__(self, formula_id, bounds, default_power=2, uses_power=False):
+        self.formula_id = formula_id
+        self.bounds = bounds
+        self.default_power = default_power
+        self.uses_power = uses_power
+
+
+FORMULAS = {
+    "Mandelbrot": EscapeFormula(FORMULA_MANDELBROT, (-2.0, 1.0, -1.5, 1.5)),
+    "Burning Ship": EscapeFormula(FORMULA_BURNING_SHIP, (-2.5, 1.5, -2.0, 1.0)),
+    "Multibrot (z^d + c)": EscapeFormula(FORMULA_MULTIBROT, (-1.6, 1.6, -1.6, 1.6), 3, True),
+    "Tricorn": EscapeFormula(FORMULA_TRICORN, (-2.2, 1.4, -1.8, 1.8)),
+    "Newton (z^d - 1)": EscapeFormula(FORMULA_NEWTON, (-1.5, 1.5, -1.5, 1.5), 3, True),
+}
+
+
+def formula_set(
+    name, width, height, max_iter, bounds=None, power=None,
+    n_threads=None, tile_size=DEFAULT_TILE_SIZE, should_cancel=None,
+):
+    """
+    Macierz iteracji dla formuły z rejestru FORMULAS, liczona kafelkami na wielu wątkach.
+
+    Args:
+        name: nazwa formuły (klucz FORMULAS)
+        width, height: rozmiar macierzy wynikowej
+        max_iter: maksymalna liczba iteracji
+        bounds: (xmin, xmax, ymin, ymax), domyślnie widok zapisany w rejestrze
+        power: stopień dla Multibrota/Newtona (domyślnie z rejestru)
+
+    Returns:
+        macierz int32 (height, width) jak w mandelbrot_set() lub None jeśli przerwano
+    """
+    formula = FORMULAS.get(name)
+    if formula is None:
+        raise ValueError(f"Nieznana formula: {name}")
+    power = formula.default_power if power is None else int(power)
+    if power < 2:
+        raise ValueError("Stopien formuly musi byc >= 2.")
+    xmin, xmax, ymin, ymax = formula.bounds if bounds is None else bounds
+
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    mset = np.zeros((height, width), dtype=np.int32)
+    kernel = FORMULA_KERNELS[formula.formula_id]
+
+    def tile_fn(row0, row1, col0, col1):
+        kernel(mset, r1, r2, power, row0, row1, col0, col1, max_iter)
+
+    if not run_tiles(tile_fn, width, height, n_threads, tile_size, should_cancel):
+        return None
+    return mset
+
+
+if __name__ == "__main__":
+    import time
+
+    from mandelbrot_engine import mandelbrot_set_parallel
+
+    width = height = 1000
+    max_iter = 1000
+    view = FORMULAS["Mandelbrot"].bounds
+
+    start = time.perf_counter()
+    for name in FORMULAS:
+        formula_set(name, 16, 16, 10)
+    print(f"Kompilacja / wczytanie z dysku wszystkich formul: {time.perf_counter() - start:.2f} s")
+
+    # nieparzyste wymiary - środkowy piksel to dokładnie z = 0, gdzie pochodna Newtona się zeruje
+    newton = formula_set("Newton (z^d - 1)", 101, 101, 50)
+    if newton[50, 50] != 50:
+        raise RuntimeError("Punkt z = 0 metody Newtona powinien byc niezbiezny (max_iter).")
+
+    mandelbrot_set_parallel(*view, 16, 16, 10)
+    start = time.perf_counter()
+    reference = mandelbrot_set_parallel(*view, width, height, max_iter)
+    hand_written = time.perf_counter() - start
+
+    print(f"Formuly {width}x{height}, max_iter={max_iter}:")
+    print(f"{'formula':>22} {'czas [s]':>9} {'iteracje/s':>12}")
+    print(f"{'mandelbrot_set (recznie)':>22} {hand_written:>9.3f} {reference.sum(dtype=np.int64) / hand_written:>12.3e}")
+    for name in FORMULAS:
+        start = time.perf_counter()
+        mset = formula_set(name, width, height, max_iter)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>22} {elapsed:>9.3f} {mset.sum(dtype=np.int64) / elapsed:>12.3e}")
+        if name == "Mandelbrot" and not np.array_equal(mset, reference):
+            raise RuntimeError("Formula Mandelbrot rozni sie od mandelbrot_set().")
@@ -0,0 +1,153 @@
+import numpy as np
+from numba import jit
+
+from mandelbrot_engine import DEFAULT_TILE_SIZE, default_thread_count, run_tiles
+from mandelbrot_set import _continue_orbit
+
+DEFAULT_JULIA_BOUNDS = (-1.6, 1.6, -1.6, 1.6)
+# Obszar płaszczyzny c, nad którym rozkładany jest atlas (jak domyślny widok Mandelbrota)
+DEFAULT_ATLAS_BOUNDS = (-2.0, 1.0, -1.5, 1.5)
+
+
+@jit(nopython=True, nogil=True)
+def julia_tile(jset, r1, r2, cr, ci, row0, row1, col0, col1, max_iter):
+    """
+    Kafelek zbioru Julii dla parametru c = cr + ci*i: piksel to punkt startowy z_0,
+    iteracja z -> z^2 + c ta sama co w mandelbrot_set (_continue_orbit), bez skrótów dla
+    wnętrza - test kardioidy dotyczy c, a nie z_0.
+    """
+    for i in range(row0, row1):
+        for j in range(col0, col1):
+            jset[i, j] = _continue_orbit(cr, ci, r1[j], r2[i], 0, max_iter, False)[0]
+
+
+@jit(nopython=True, nogil=True)
+def julia_batch_range(out, cs_re, cs_im, r1, r2, k0, k1, max_iter):
+    """
+    Liczy obrazy k0..k1-1 partii zbiorów Julii w jednym wywołaniu skompilowanym
+    (out[k] dla c = cs_re[k] + cs_im[k]*i) - bez narzutu Pythona na każdy obraz.
+    """
+    height, width = out.shape[1], out.shape[2]
+    for k in range(k0, k1):
+        cr = cs_re[k]
+        ci = cs_im[k]
+        for i in range(height):
+            for j in range(width):
+                out[k, i, j] = _continue_orbit(cr, ci, r1[j], r2[i], 0, max_iter, False)[0]
+
+
+def julia_set(
+    c, xmin, xmax, ymin, ymax, width, height, max_iter,
+    n_threads=None, tile_size=DEFAULT_TILE_SIZE, should_cancel=None,
+):
+    """
+    Macierz iteracji zbioru Julii dla parametru c, liczona kafelkami na wielu wątkach.
+
+    Args:
+        c: parametr (liczba zespolona)
+        xmin, xmax, ymin, ymax: zakres płaszczyzny z
+        width, height: rozmiar macierzy wynikowej
+        max_iter: maksymalna liczba iteracji
+
+    Returns:
+        macierz int32 (height, width) jak w mandelbrot_set() lub None jeśli przerwano
+    """
+    c = complex(c)
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    jset = np.zeros((height, width), dtype=np.int32)
+
+    def tile_fn(row0, row1, col0, col1):
+        julia_tile(jset, r1, r2, c.real, c.imag, row0, row1, col0, col1, max_iter)
+
+    if not run_tiles(tile_fn, width, height, n_threads, tile_size, should_cancel):
+        return None
+    return jset
+
+
+def julia_batch(
+    cs, xmin, xmax, ymin, ymax, width, height, max_iter,
+    n_threads=None, images_per_task=None, should_cancel=None,
+):
+    """
+    Partia zbiorów Julii (ten sam zakres z, różne c). Wątki dostają przedziały obrazów,
+    a każdy przedział to jedno wywołanie julia_batch_range().
+
+    Args:
+        cs: sekwencja parametrów c (liczby zespolone)
+        images_per_task: ile obrazów liczy jedno wywołanie (domyślnie tak, żeby wyszło ~8 zadań na wątek)
+
+    Returns:
+        tablica int32 (len(cs), height, width) lub None jeśli przerwano
+    """
+    cs = np.asarray(cs, dtype=np.complex128).ravel()
+    cs_re = np.ascontiguousarray(cs.real)
+    cs_im = np.ascontiguousarray(cs.imag)
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    out = np.zeros((len(cs), height, width), dtype=np.int32)
+    if len(cs) == 0:
+        return out
+    if images_per_task is None:
+        images_per_task = max(1, len(cs) // (8 * (n_threads or default_thread_count())))
+
+    # "kafelki" jednowierszowego obrazu len(cs) x 1 to przedziały indeksów obrazów
+    def tile_fn(_row0, _row1, k0, k1):
+        julia_batch_range(out, cs_re, cs_im, r1, r2, k0, k1, max_iter)
+
+    if not run_tiles(tile_fn, len(cs), 1, n_threads, images_per_task, should_cancel):
+        return None
+    return out
+
+
+def julia_atlas(
+    columns, rows, thumb_width, thumb_height, max_iter,
+    c_bounds=DEFAULT_ATLAS_BOUNDS, julia_bounds=DEFAULT_JULIA_BOUNDS, n_threads=None, should_cancel=None,
+):
+    """
+    Atlas Mandelbrota-Julii: siatka columns x rows miniatur zbiorów Julii, każda dla c ze środka
+    swojej komórki na płaszczyźnie c - razem układają się w kształt zbioru Mandelbrota.
+
+    Returns:
+        (atlas int32 (rows*thumb_height, columns*thumb_width) z wierszem 0 = cmin jak w mandelbrot_set(),
+         tablica parametrów c (rows, columns)) albo None jeśli przerwano
+    """
+    cx_min, cx_max, cy_min, cy_max = c_bounds
+    c_re = cx_min + (np.arange(columns) + 0.5) * (cx_max - cx_min) / columns
+    c_im = cy_min + (np.arange(rows) + 0.5) * (cy_max - cy_min) / rows
+    cs = c_re[np.newaxis, :] + 1j * c_im[:, np.newaxis]
+
+    thumbs = julia_batch(
+        cs, *julia_bounds, thumb_width, thumb_height, max_iter,
+        n_threads=n_threads, should_cancel=should_cancel,
+    )
+    if thumbs is None:
+        return None
+    atlas = thumbs.reshape(rows, columns, thumb_height, thumb_width).transpose(0, 2, 1, 3)
+    return atlas.reshape(rows * thumb_height, columns * thumb_width), cs
+
+
+if __name__ == "__main__":
+    import time
+
+    julia_set(0.0, *DEFAULT_JULIA_BOUNDS, 16, 16, 10)
+    julia_batch([0.0, 0.5j], *DEFAULT_JULIA_BOUNDS, 16, 16, 10)
+
+    for n_side, thumb, max_iter in ((20, 64, 300), (32, 24, 100)):
+        cs = (
+            np.linspace(-2.0, 1.0, n_side)[np.newaxis, :] + 1j * np.linspace(-1.5, 1.5, n_side)[:, np.newaxis]
+        ).ravel()
+
+        start = time.perf_counter()
+        single = [julia_set(c, *DEFAULT_JULIA_BOUNDS, thumb, thumb, max_iter) for c in cs]
+        per_image = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = julia_batch(cs, *DEFAULT_JULIA_BOUNDS, thumb, thumb, max_iter)
+        batched = time.perf_counter() - start
+
+        if not np.array_equal(np.stack(single), batch):
+            raise RuntimeError("Wynik partii rozni sie od pojedynczych obrazow.")
+        print(f"{len(cs)} zbiorow Julii {thumb}x{thumb}, max_iter={max_iter} (watki: {default_thread_count()}):")
+        print(f"  osobne wywolania: {per_image:.3f} s")
+        print(f"  jedna partia:     {batched:.3f} s ({per_image / batched:.1f}x)")
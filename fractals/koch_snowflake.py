@@ -6,30 +6,21 @@ _ROTATION = np.array(
     [[_COS_60, _SIN_60], [-_SIN_60, _COS_60]],
     dtype=np.float64,
 )
-
-
-def _generate_segment(p1: np.ndarray, p2: np.ndarray, depth: int) -> list[np.ndarray]:
-    """Zwraca punkty jednego segmentu krzywej Kocha."""
-    if depth == 0:
-        return [p2]
-
-    vector = (p2 - p1) / 3.0
-    p_a = p1 + vector
-    p_c = p1 + 2.0 * vector
-    p_d = p_a + _ROTATION @ vector
-
-    points: list[np.ndarray] = []
-    points.extend(_generate_segment(p1, p_a, depth - 1))
-    points.extend(_generate_segment(p_a, p_d, depth - 1))
-    points.extend(_generate_segment(p_d, p_c, depth - 1))
-    points.extend(_generate_segment(p_c, p2, depth - 1))
-    return points
+# Krzywa Kocha nad odcinkiem długości L leży w trójkącie o wysokości L * sqrt(3) / 6 nad nim
+_BULGE = np.sqrt(3) / 6
+# Maksymalna głębokość leniwego podziału - odcinek 3^-30 boku to granica dokładności float64
+LAZY_MAX_DEPTH = 30
 
 
 def koch_snowflake_points(order: int, side_length: float = 1.0) -> np.ndarray:
     """
     Generuje punkty należące do płatka śniegu Kocha.
 
+    Wszystkie poziomy powstają w jednym buforze (3 * 4^order + 1, 2): punkty poziomu k leżą
+    docelowo co 4^(order - k) pozycji, więc każdy kolejny poziom dopisuje trzy nowe punkty
+    między sąsiednimi punktami poprzedniego operacjami na całych (strided) widokach tablicy -
+    bez rekurencji, list i łączenia tablic.
+
     Args:
         order: poziom rekursji (>=0).
         side_length: długość początkowego boku trójkąta równobocznego.
@@ -43,12 +34,151 @@ def koch_snowflake_points(order: int, side_length: float = 1.0) -> np.ndarray:
         raise ValueError("Side length must be positive.")
 
     height = side_length * np.sqrt(3) / 2.0
-    v1 = np.array([0.0, 0.0], dtype=np.float64)
-    v2 = np.array([side_length, 0.0], dtype=np.float64)
-    v3 = np.array([side_length / 2.0, height], dtype=np.float64)
+    n_segments = 3 * 4**order
+    points = np.empty((n_segments + 1, 2), dtype=np.float64)
+    # poziom 0: wierzchołki trójkąta (i powrót do pierwszego) co 4^order pozycji
+    points[:: 4**order] = ((0.0, 0.0), (side_length, 0.0), (side_length / 2.0, height), (0.0, 0.0))
+
+    for level in range(order):
+        step = 4 ** (order - level)
+        quarter = step // 4
+        p1 = points[:-1:step]
+        p2 = points[step::step]
+        vector = (p2 - p1) / 3.0
+        p_a = points[quarter::step]
+        np.add(p1, vector, out=p_a)
+        np.add(p1, 2.0 * vector, out=points[3 * quarter::step])
+        # wierzchołek ząbka: p_a + obrót wektora o 60 stopni
+        np.add(p_a, vector @ _ROTATION.T, out=points[2 * quarter::step])
+
+    return points
+
+
+def subdivide_segments(segments: np.ndarray) -> np.ndarray:
+    """
+    Jeden poziom krzywej Kocha dla tablicy odcinków (m, 2, 2): każdy odcinek zastępują
+    cztery (p1, p_a), (p_a, p_d), (p_d, p_c), (p_c, p2) - operacjami na całych tablicach.
+
+    Returns:
+        tablica (4m, 2, 2)
+    """
+    p1, p2 = segments[:, 0], segments[:, 1]
+    vector = (p2 - p1) / 3.0
+    children = np.empty((len(segments), 4, 2, 2), dtype=np.float64)
+    children[:, 0, 0] = p1
+    children[:, 3, 1] = p2
+    np.add(p1, vector, out=children[:, 0, 1])
+    np.add(p1, 2.0 * vector, out=children[:, 2, 1])
+    np.add(children[:, 0, 1], vector @ _ROTATION.T, out=children[:, 1, 1])
+    children[:, 1, 0] = children[:, 0, 1]
+    children[:, 2, 0] = children[:, 1, 1]
+    children[:, 3, 0] = children[:, 2, 1]
+    return children.reshape(-1, 2, 2)
+
+
+def koch_visible_segments(pixel_size: float, bounds=None, side_length: float = 1.0, should_cancel=None):
+    """
+    Leniwe generowanie płatka Kocha dla widoku: podział poziom po poziomie tylko odcinków,
+    których krzywa (trójkąt o wysokości L * sqrt(3) / 6 nad odcinkiem) przecina widok, aż
+    odcinki staną się nie dłuższe niż piksel. Praca i pamięć zależą od widocznej części, a nie
+    od przybliżenia - aż do granicy dokładności float64 (LAZY_MAX_DEPTH).
+
+    Args:
+        pixel_size: rozmiar piksela w jednostkach wykresu.
+        bounds: (xmin, xmax, ymin, ymax) widoku, None - cała figura.
+        side_length: długość początkowego boku trójkąta równobocznego.
+        should_cancel: opcjonalna funkcja zwracająca True jeśli generowanie ma być anulowane
+            (sprawdzana raz na poziom).
+
+    Returns:
+        np.ndarray shape (2s, 2) z końcami s odcinków (format serii z segments=True) lub None jeśli przerwano.
+    """
+    if pixel_size <= 0.0:
+        raise ValueError("Pixel size must be positive.")
+    if side_length <= 0.0:
+        raise ValueError("Side length must be positive.")
+
+    height = side_length * np.sqrt(3) / 2.0
+    vertices = np.array([[0.0, 0.0], [side_length, 0.0], [side_length / 2.0, height]], dtype=np.float64)
+    segments = np.stack((vertices, np.roll(vertices, -1, axis=0)), axis=1)
+    length = side_length
+    for _ in range(LAZY_MAX_DEPTH + 1):
+        if bounds is not None:
+            xmin, xmax, ymin, ymax = bounds
+            margin = length * _BULGE
+            low = segments.min(axis=1) - margin
+            high = segments.max(axis=1) + margin
+            segments = segments[
+                (low[:, 0] <= xmax) & (high[:, 0] >= xmin) & (low[:, 1] <= ymax) & (high[:, 1] >= ymin)
+            ]
+        if length <= pixel_size or len(segments) == 0:
+            break
+        if should_cancel and should_cancel():
+            return None
+        segments = subdivide_segments(segments)
+        length /= 3.0
+    return segments.reshape(-1, 2)
+
+
+if __name__ == "__main__":
+    import time
+
+    def _generate_segment(p1: np.ndarray, p2: np.ndarray, depth: int) -> list[np.ndarray]:
+        """Zwraca punkty jednego segmentu krzywej Kocha."""
+        if depth == 0:
+            return [p2]
+
+        vector = (p2 - p1) / 3.0
+        p_a = p1 + vector
+        p_c = p1 + 2.0 * vector
+        p_d = p_a + _ROTATION @ vector
+
+        points: list[np.ndarray] = []
+        points.extend(_generate_segment(p1, p_a, depth - 1))
+        points.extend(_generate_segment(p_a, p_d, depth - 1))
+        points.extend(_generate_segment(p_d, p_c, depth - 1))
+        points.extend(_generate_segment(p_c, p2, depth - 1))
+        return points
+
+    def recursive_koch_points(order, side_length=1.0):
+        """Poprzednia wersja (rekurencja na segment, np.vstack na końcu) do porównania."""
+        height = side_length * np.sqrt(3) / 2.0
+        v1 = np.array([0.0, 0.0], dtype=np.float64)
+        v2 = np.array([side_length, 0.0], dtype=np.float64)
+        v3 = np.array([side_length / 2.0, height], dtype=np.float64)
+
+        points: list[np.ndarray] = [v1]
+        for start, end in ((v1, v2), (v2, v3), (v3, v1)):
+            points.extend(_generate_segment(start, end, order))
+
+        return np.vstack(points)
+
+    for order in range(6):
+        if not np.allclose(recursive_koch_points(order), koch_snowflake_points(order), rtol=0.0, atol=1e-12):
+            raise RuntimeError("Wersja wektorowa rozni sie od rekurencyjnej.")
 
-    points: list[np.ndarray] = [v1]
-    for start, end in ((v1, v2), (v2, v3), (v3, v1)):
-        points.extend(_generate_segment(start, end, order))
+    print("Platek Kocha:")
+    print(f"{'poziom':>7} {'punkty':>10} {'rekurencja [s]':>15} {'wektorowo [s]':>14}")
+    for order in (5, 7, 9, 11):
+        recursive_time = float("nan")
+        if order <= 7:
+            start = time.perf_counter()
+            recursive_koch_points(order)
+            recursive_time = time.perf_counter() - start
+        start = time.perf_counter()
+        points = koch_snowflake_points(order)
+        elapsed = time.perf_counter() - start
+        print(f"{order:>7} {len(points):>10} {recursive_time:>15.3f} {elapsed:>14.4f}")
 
-    return np.vstack(points)
\ No newline at end of file
+    # leniwe generowanie: przy przybliżaniu w punkt krzywej koszt zostaje stały
+    if not np.allclose(koch_visible_segments(1.0 / 3**4)[1::2], koch_snowflake_points(4)[1:], rtol=0.0, atol=1e-12):
+        raise RuntimeError("Leniwe generowanie rozni sie od pelnej krzywej.")
+    print("Leniwe generowanie (widok 1000 pikseli wokol punktu krzywej):")
+    center = koch_snowflake_points(8)[12345]
+    for zoom in (1, 1e3, 1e6, 1e9, 1e12):
+        half = 0.75 / zoom
+        bounds = (center[0] - half, center[0] + half, center[1] - half, center[1] + half)
+        start = time.perf_counter()
+        segments = koch_visible_segments(2 * half / 1000, bounds)
+        elapsed = time.perf_counter() - start
+        print(f"  przyblizenie {zoom:>7.0e}: {len(segments) // 2:>7} odcinkow, {elapsed:.4f} s")
@@ -5,11 +5,20 @@ from constants import (
     DPG_CONTROL_GROUP,
     DPG_RIGHT_PANEL,
     DPG_STATUS_TEXT,
+    FRACTAL_BUDDHABROT,
     FRACTAL_CUSTOM_IFS,
+    FRACTAL_ESCAPE_FORMULA,
+    FRACTAL_JULIA,
     VIEWPORT_HEIGHT,
     VIEWPORT_WIDTH,
 )
-from controllers import cancel_generation, generate_and_plot, update_controls
+from controllers import (
+    cancel_generation,
+    generate_and_plot,
+    register_lazy_view_handlers,
+    register_mandelbrot_handlers,
+    update_controls,
+)
 from mandelbrot_set import mandelbrot_set as mandelbrot_set_numba
 
 
@@ -33,6 +42,9 @@ def main_gui():
         if default_font:
             dpg.bind_font(default_font)
 
+    register_mandelbrot_handlers()
+    register_lazy_view_handlers()
+
     with dpg.window(label="Glowne Okno", tag="main_window", no_title_bar=True, no_resize=False, no_move=True):
         with dpg.group(horizontal=True):
             with dpg.child_window(
@@ -47,6 +59,9 @@ def main_gui():
                 dpg.add_combo(
                     items=[
                         "Zbior Mandelbrota",
+                        FRACTAL_JULIA,
+                        FRACTAL_ESCAPE_FORMULA,
+                        FRACTAL_BUDDHABROT,
                         "Paproc Barnsleya",
                         "Trojkat Sierpinskiego (Chaos Game)",
                         "Trojkat Sierpinskiego (Rekurencyjnie)",
@@ -0,0 +1,195 @@
+import numpy as np
+from numba import jit
+
+from mandelbrot_colors import DEFAULT_PALETTE, colorize, lut_blend, lut_position, palette_lut, store_color
+from mandelbrot_engine import run_tiles
+from mandelbrot_set import NO_FRACTION, _escape_time, smooth_fraction
+
+# Próbki na bok piksela krawędzi (4 -> 4x4 = 16 próbek)
+DEFAULT_SUPERSAMPLING = 4
+# Próg różnicy (ciągłej) liczby iteracji z sąsiadem, od którego piksel uznawany jest za krawędź
+# przy gładkim kolorowaniu - łagodne przejścia kolorów nie wymagają wygładzania
+SMOOTH_EDGE_THRESHOLD = 1.0
+# Supersampling jest drogi (factor^2 orbit na piksel), więc kafelki są mniejsze niż przy renderze
+_SUPERSAMPLE_TILE_SIZE = 32
+
+
+@jit(nopython=True, nogil=True)
+def edge_mask_tile(edges, mset, fraction, max_iter, threshold, row0, row1, col0, col1):
+    """
+    Oznacza w edges piksele, których liczba iteracji (n + fraction przy gładkim kolorowaniu)
+    różni się od któregoś z 8 sąsiadów o więcej niż threshold, oraz piksele na granicy
+    zbioru (sąsiad w zbiorze, piksel poza nim lub odwrotnie) - tylko tam widać schodki.
+    """
+    height, width = mset.shape
+    smooth = fraction.shape[0] > 0
+    for i in range(row0, row1):
+        for j in range(col0, col1):
+            inside = mset[i, j] >= max_iter
+            value = mset[i, j] + (fraction[i, j] if smooth else 0.0)
+            edge = False
+            for ii in range(max(i - 1, 0), min(i + 2, height)):
+                for jj in range(max(j - 1, 0), min(j + 2, width)):
+                    if (mset[ii, jj] >= max_iter) != inside:
+                        edge = True
+                    elif not inside:
+                        neighbour = mset[ii, jj] + (fraction[ii, jj] if smooth else 0.0)
+                        if abs(neighbour - value) > threshold:
+                            edge = True
+            edges[i, j] = edge
+
+
+@jit(nopython=True, nogil=True)
+def supersample_tile(out, edges, lut, r1, r2, factor, max_iter, smooth, row0, row1, col0, col1):
+    """
+    Dla pikseli oznaczonych w edges liczy factor x factor próbek równomiernie w obrębie piksela
+    i zapisuje do out (bufor obrazu jak z colorize(), wiersze odwrócone) średnią ich kolorów.
+    Średnia kolorów, nie iteracji - granica zbioru przechodzi w kolor pośredni zamiast schodków.
+    Skróty dla wnętrza są włączone - nie zmieniają wyniku, a próbki w zbiorze są najdroższe.
+
+    Returns:
+        liczba policzonych próbek
+    """
+    height = edges.shape[0]
+    dx = r1[1] - r1[0] if r1.shape[0] > 1 else 0.0
+    dy = r2[1] - r2[0] if r2.shape[0] > 1 else 0.0
+    weight = 1.0 / (factor * factor)
+    color = np.zeros(4)
+    samples = 0
+    for i in range(row0, row1):
+        for j in range(col0, col1):
+            if not edges[i, j]:
+                continue
+            color[:] = 0.0
+            for si in range(factor):
+                ci = r2[i] + ((si + 0.5) / factor - 0.5) * dy
+                for sj in range(factor):
+                    cr = r1[j] + ((sj + 0.5) / factor - 0.5) * dx
+                    n, _, mag2 = _escape_time(cr, ci, max_iter, True)
+                    frac = smooth_fraction(mag2) if smooth and n < max_iter else 0.0
+                    idx, nxt, t = lut_position(n, frac, max_iter, lut.shape[0], smooth)
+                    for k in range(4):
+                        color[k] += lut_blend(lut, idx, nxt, t, k)
+            samples += factor * factor
+            for k in range(4):
+                store_color(out, height - 1 - i, j, k, color[k] * weight)
+    return samples
+
+
+def antialias(
+    out, mset, bounds, max_iter, fraction=None, factor=DEFAULT_SUPERSAMPLING, threshold=None,
+    palette=DEFAULT_PALETTE, full=False, n_threads=None, should_cancel=None, stats=None,
+):
+    """
+    Adaptacyjny antyaliasing gotowego obrazu: supersampling tylko pikseli na krawędziach
+    (patrz edge_mask_tile), reszta obrazu zostaje z renderu 1x. Obszary jednolite i łagodne
+    gradienty wyglądają tak samo przy pełnym supersamplingu, więc koszt to ułamek factor^2.
+    Próbki liczone są w float64 - dla głębszych przybliżeń wynik byłby niedokładny.
+
+    Args:
+        out: bufor obrazu (height, width, 4) z colorize() tej samej macierzy - nadpisywany w miejscu
+        mset: macierz iteracji int32 (height, width) renderu 1x
+        bounds: (xmin, xmax, ymin, ymax) - zakres, dla którego policzono mset
+        max_iter: maksymalna liczba iteracji
+        fraction: część ułamkowa iteracji (gładkie kolorowanie) albo None
+        factor: liczba próbek na bok piksela
+        threshold: próg różnicy iteracji dla krawędzi (domyślnie SMOOTH_EDGE_THRESHOLD przy
+            gładkim kolorowaniu, 0 - każda różnica - bez niego)
+        full: True liczy próbki dla każdego piksela (pełny supersampling, do porównań)
+        stats: opcjonalny słownik uzupełniany o 'edge_pixels' i 'extra_samples'
+
+    Returns:
+        out albo None jeśli przerwano
+    """
+    if factor < 1:
+        raise ValueError("Liczba probek na bok piksela musi byc dodatnia.")
+    height, width = mset.shape
+    smooth = fraction is not None
+    fraction = fraction if smooth else NO_FRACTION
+    if threshold is None:
+        threshold = SMOOTH_EDGE_THRESHOLD if smooth else 0.0
+    xmin, xmax, ymin, ymax = bounds
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    lut = palette_lut(palette, out.dtype.type)
+
+    if full:
+        edges = np.ones((height, width), dtype=np.bool_)
+    else:
+        edges = np.zeros((height, width), dtype=np.bool_)
+
+        def edge_fn(row0, row1, col0, col1):
+            edge_mask_tile(edges, mset, fraction, max_iter, threshold, row0, row1, col0, col1)
+
+        if not run_tiles(edge_fn, width, height, n_threads, should_cancel=should_cancel):
+            return None
+
+    samples = []
+
+    def tile_fn(row0, row1, col0, col1):
+        samples.append(supersample_tile(out, edges, lut, r1, r2, factor, max_iter, smooth, row0, row1, col0, col1))
+
+    if not run_tiles(tile_fn, width, height, n_threads, _SUPERSAMPLE_TILE_SIZE, should_cancel):
+        return None
+    if stats is not None:
+        stats["edge_pixels"] = int(np.count_nonzero(edges))
+        stats["extra_samples"] = int(sum(samples))
+    return out
+
+
+def antialiased_mandelbrot(
+    xmin, xmax, ymin, ymax, width, height, max_iter, factor=DEFAULT_SUPERSAMPLING,
+    palette=DEFAULT_PALETTE, full=False, n_threads=None, stats=None,
+):
+    """
+    Obraz RGBA float32 (height, width, 4) do eksportu: render 1x z gładkim kolorowaniem,
+    kolorowanie i antialias() krawędzi. Wiersz 0 wyniku to góra obrazu (jak w colorize()).
+    """
+    from mandelbrot_viewport import MandelbrotViewport
+
+    viewport = MandelbrotViewport(width, height, (xmin, xmax, ymin, ymax))
+    mset = viewport.render(max_iter, n_threads=n_threads, interior_checks=True, smooth=True)
+    image = colorize(mset, max_iter, viewport.fraction, palette, n_threads=n_threads)
+    return antialias(
+        image, mset, viewport.bounds, max_iter, viewport.fraction, factor,
+        palette=palette, full=full, n_threads=n_threads, stats=stats,
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    from mandelbrot_engine import BENCHMARK_VIEWS
+    from mandelbrot_viewport import MandelbrotViewport
+
+    width = height = 1000
+    max_iter = 1000
+    antialiased_mandelbrot(-2.0, 1.0, -1.5, 1.5, 32, 32, 10)
+
+    print(f"Antyaliasing {width}x{height}, max_iter={max_iter}, {DEFAULT_SUPERSAMPLING}x{DEFAULT_SUPERSAMPLING} probek:")
+    print(
+        f"{'widok':>14} {'1x [s]':>8} {'krawedzie [s]':>14} {'pelny [s]':>10} {'dodatkowe probki':>17} "
+        f"{'sr. roznica':>12} {'maks.':>6}"
+    )
+    for name, view in BENCHMARK_VIEWS.items():
+        start = time.perf_counter()
+        viewport = MandelbrotViewport(width, height, view)
+        colorize(viewport.render(max_iter, interior_checks=True, smooth=True), max_iter, viewport.fraction)
+        plain_time = time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        adaptive = antialiased_mandelbrot(*view, width, height, max_iter, stats=stats)
+        adaptive_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = antialiased_mandelbrot(*view, width, height, max_iter, full=True)
+        full_time = time.perf_counter() - start
+
+        # różnica z pełnym supersamplingiem w skali 0..255 (jak w zapisanym obrazie 8-bitowym)
+        difference = np.abs(adaptive[..., :3] - full[..., :3]) * 255
+        extra = stats["extra_samples"] / (width * height)
+        print(
+            f"{name:>14} {plain_time:>8.3f} {adaptive_time:>14.3f} {full_time:>10.3f} "
+            f"{extra:>16.2f}x {difference.mean():>12.3f} {difference.max():>6.1f}"
+        )
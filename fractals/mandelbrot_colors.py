@@ -0,0 +1,248 @@
+from functools import lru_cache
+
+import numpy as np
+from numba import jit
+
+from mandelbrot_engine import run_tiles
+from mandelbrot_set import NO_FRACTION
+
+DEFAULT_PALETTE = "hot"
+# Paleta obrazów gęstości (Buddhabrot, histogramy punktów) - ciemne tło, jasne obszary częstych odwiedzin
+DEFAULT_DENSITY_PALETTE = "inferno"
+# Kafelki kolorowania są tanie - większe niż przy liczeniu iteracji, żeby narzut Pythona był pomijalny
+_COLOR_TILE_SIZE = 256
+
+
+@lru_cache(maxsize=None)
+def palette_lut(name=DEFAULT_PALETTE, dtype=np.float32):
+    """
+    Tablica kolorów (LUT) z mapy kolorów matplotlib - matplotlib potrzebny jest tylko tutaj,
+    a wynik jest zapamiętywany, więc import i budowanie tablicy odbywa się raz na paletę.
+
+    Args:
+        name: nazwa mapy kolorów matplotlib
+        dtype: np.float32 (składowe 0..1, tekstury DearPyGui) albo np.uint8 (0..255)
+
+    Returns:
+        tablica (liczba kolorów, 4) RGBA tylko do odczytu
+    """
+    import matplotlib
+
+    colormap = matplotlib.colormaps[name]
+    if np.dtype(dtype) == np.uint8:
+        # zaokrąglenie zamiast obcinania z colormap(..., bytes=True) - LUT uint8 = LUT float32 * 255
+        lut = np.round(colormap(np.arange(colormap.N)) * 255).astype(np.uint8)
+    elif np.dtype(dtype) == np.float32:
+        lut = colormap(np.arange(colormap.N)).astype(np.float32)
+    else:
+        raise ValueError(f"Nieobslugiwany typ palety: {np.dtype(dtype)}")
+    lut.flags.writeable = False
+    return lut
+
+
+@jit(nopython=True, nogil=True)
+def lut_position(n, fraction, max_iter, lut_size, smooth):
+    """
+    Miejsce iteracji n (+ fraction przy smooth) w tablicy kolorów: (indeks, następny indeks, waga).
+    Kolor to lut[indeks] + waga * (lut[następny] - lut[indeks]); punkty zbioru dostają ostatni kolor.
+    """
+    last = lut_size - 1
+    if n >= max_iter:
+        return last, last, 0.0
+    scale = lut_size / max_iter
+    if smooth:
+        position = max(0.0, (n + fraction) * scale)
+        idx = min(int(position), last)
+        return idx, min(idx + 1, last), position - idx
+    idx = min(int(n * scale), last)
+    return idx, idx, 0.0
+
+
+@jit(nopython=True, nogil=True)
+def lut_blend(lut, idx, nxt, t, k):
+    """
+    Składowa k koloru lut[idx] + t * (lut[nxt] - lut[idx]) liczona w float64 - przy LUT uint8
+    różnica liczona w uint8 przekręcałaby się, gdy składowa między wpisami maleje.
+    """
+    a = np.float64(lut[idx, k])
+    return a + t * (np.float64(lut[nxt, k]) - a)
+
+
+@jit(nopython=True, nogil=True)
+def store_color(out, row, col, k, value):
+    """
+    Zapisuje składową koloru do bufora: dla uint8 (typ całkowity) z zaokrągleniem i przycięciem
+    do 0..255 - samo rzutowanie obcinałoby część ułamkową; float32 bez zmian.
+    """
+    if out.dtype.type(0.5) == 0:
+        out[row, col, k] = min(max(value + 0.5, 0.0), 255.0)
+    else:
+        out[row, col, k] = value
+
+
+@jit(nopython=True, nogil=True)
+def colorize_tile(out, mset, fraction, lut, max_iter, row0, row1, col0, col1):
+    """
+    Koloruje fragment macierzy iteracji przez tablicę kolorów, zapisując wprost do bufora tekstury.
+    Wiersze są odwracane (wiersz 0 macierzy = ymin trafia na dół obrazu), bez kopii pośrednich.
+    Liczba iteracji n mapowana jest liniowo na LUT jak w matplotlib (n / max_iter), punkty zbioru
+    dostają ostatni kolor. Z niepustą fraction kolor interpolowany jest między sąsiednimi
+    wpisami LUT dla n + fraction - gładkie przejścia zamiast pasów (patrz lut_position).
+
+    Args:
+        out: bufor tekstury (height, width, 4) o typie jak lut
+        mset: macierz iteracji int32 (height, width)
+        fraction: część ułamkowa iteracji float32 (height, width) albo pusta (0, 0)
+        lut: tablica kolorów (liczba kolorów, 4)
+        max_iter: maksymalna liczba iteracji
+        row0, row1, col0, col1: zakres kafelka
+    """
+    height = mset.shape[0]
+    smooth = fraction.shape[0] > 0
+    for i in range(row0, row1):
+        row = height - 1 - i
+        for j in range(col0, col1):
+            if smooth:
+                idx, nxt, t = lut_position(mset[i, j], fraction[i, j], max_iter, lut.shape[0], True)
+                for k in range(4):
+                    store_color(out, row, j, k, lut_blend(lut, idx, nxt, t, k))
+            else:
+                idx = lut_position(mset[i, j], 0.0, max_iter, lut.shape[0], False)[0]
+                for k in range(4):
+                    out[row, j, k] = lut[idx, k]
+
+
+def colorize(mset, max_iter, fraction=None, palette=DEFAULT_PALETTE, out=None, dtype=np.float32, n_threads=None):
+    """
+    Zamienia macierz iteracji na obraz RGBA na wielu wątkach (kafelki bez GIL).
+
+    Args:
+        mset: macierz iteracji int32 (height, width)
+        max_iter: maksymalna liczba iteracji
+        fraction: opcjonalna część ułamkowa iteracji (gładkie kolorowanie)
+        palette: nazwa mapy kolorów matplotlib
+        out: opcjonalny bufor (height, width, 4) do ponownego użycia - bez alokacji
+        dtype: typ bufora tworzonego gdy out=None (np.float32 lub np.uint8)
+        n_threads: liczba wątków (domyślnie liczba rdzeni)
+
+    Returns:
+        bufor (height, width, 4) z obrazem odwróconym w pionie (wiersz 0 = góra obrazu)
+    """
+    height, width = mset.shape
+    if out is None:
+        out = np.empty((height, width, 4), dtype=dtype)
+    elif out.shape != (height, width, 4):
+        raise ValueError(f"Nieprawidlowy ksztalt bufora: {out.shape}, oczekiwano {(height, width, 4)}")
+    lut = palette_lut(palette, out.dtype.type)
+    if fraction is None:
+        fraction = NO_FRACTION
+
+    def tile_fn(row0, row1, col0, col1):
+        colorize_tile(out, mset, fraction, lut, max_iter, row0, row1, col0, col1)
+
+    run_tiles(tile_fn, width, height, n_threads, _COLOR_TILE_SIZE)
+    return out
+
+
+@jit(nopython=True, nogil=True)
+def colorize_density_tile(out, density, lut, log_scale, peak, row0, row1, col0, col1):
+    """
+    Koloruje fragment rastra gęstości (liczby odwiedzin) jak colorize_tile() - wiersze odwrócone.
+    Gęstość skalowana jest do 0..1 względem peak: logarytmicznie (log(1 + d) / log(1 + peak)),
+    bo liczby odwiedzin różnią się o rzędy wielkości, albo pierwiastkiem, gdy log_scale=False.
+    """
+    height = density.shape[0]
+    last = lut.shape[0] - 1
+    norm = np.log1p(peak) if log_scale else np.sqrt(peak)
+    for i in range(row0, row1):
+        row = height - 1 - i
+        for j in range(col0, col1):
+            d = density[i, j]
+            value = 0.0
+            if d > 0.0 and norm > 0.0:
+                value = min((np.log1p(d) if log_scale else np.sqrt(d)) / norm, 1.0)
+            position = value * last
+            idx = int(position)
+            nxt = min(idx + 1, last)
+            t = position - idx
+            for k in range(4):
+                store_color(out, row, j, k, lut_blend(lut, idx, nxt, t, k))
+
+
+def colorize_density(
+    density, palette=DEFAULT_DENSITY_PALETTE, log_scale=True, out=None, dtype=np.float32, n_threads=None,
+):
+    """
+    Zamienia raster gęstości (height, width) na obraz RGBA jak colorize() - na wielu wątkach,
+    opcjonalnie do istniejącego bufora out.
+
+    Returns:
+        bufor (height, width, 4) z obrazem odwróconym w pionie (wiersz 0 = góra obrazu)
+    """
+    height, width = density.shape
+    if out is None:
+        out = np.empty((height, width, 4), dtype=dtype)
+    elif out.shape != (height, width, 4):
+        raise ValueError(f"Nieprawidlowy ksztalt bufora: {out.shape}, oczekiwano {(height, width, 4)}")
+    lut = palette_lut(palette, out.dtype.type)
+    peak = float(density.max()) if density.size else 0.0
+
+    def tile_fn(row0, row1, col0, col1):
+        colorize_density_tile(out, density, lut, log_scale, peak, row0, row1, col0, col1)
+
+    run_tiles(tile_fn, width, height, n_threads, _COLOR_TILE_SIZE)
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    import matplotlib
+
+    from mandelbrot_viewport import MandelbrotViewport
+
+    viewport = MandelbrotViewport(1000, 1000)
+    max_iter = 1000
+    mset = viewport.render(max_iter, interior_checks=True, smooth=True)
+
+    def matplotlib_texture():
+        colors = matplotlib.colormaps[DEFAULT_PALETTE](np.flipud(mset) / max_iter)
+        return colors.astype(np.float32).flatten()
+
+    reference = matplotlib_texture()
+    buffer = colorize(mset, max_iter)
+    print(f"Zgodnosc z matplotlib: max roznica {np.abs(buffer.reshape(-1) - reference).max():.2e}")
+
+    # bufor uint8 = bufor float32 * 255 z dokładnością do zaokrąglenia (także przy gładkim kolorowaniu)
+    for palette in (DEFAULT_PALETTE, "viridis"):
+        as_float = colorize(mset, max_iter, viewport.fraction, palette) * 255
+        as_bytes = colorize(mset, max_iter, viewport.fraction, palette, dtype=np.uint8)
+        difference = np.abs(as_bytes - as_float).max()
+        if difference > 1.0:
+            raise RuntimeError(f"Kolorowanie uint8 ({palette}) rozni sie od float32 o {difference:.1f}/255.")
+    density = np.random.default_rng(0).exponential(50.0, (300, 300))
+    for log_scale in (True, False):
+        as_float = colorize_density(density, log_scale=log_scale) * 255
+        as_bytes = colorize_density(density, log_scale=log_scale, dtype=np.uint8)
+        difference = np.abs(as_bytes - as_float).max()
+        if difference > 1.0:
+            raise RuntimeError(f"Kolorowanie gestosci uint8 rozni sie od float32 o {difference:.1f}/255.")
+
+    def best_time(fn, repeats=5):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    print("Kolorowanie 1000x1000:")
+    base = best_time(matplotlib_texture)
+    print(f"{'matplotlib (float64 -> float32)':>34}: {base * 1000:7.1f} ms")
+    for label, fn in (
+        ("LUT float32, wspolny bufor", lambda: colorize(mset, max_iter, out=buffer)),
+        ("LUT float32, gladkie", lambda: colorize(mset, max_iter, viewport.fraction, out=buffer)),
+        ("LUT uint8", lambda: colorize(mset, max_iter, dtype=np.uint8)),
+    ):
+        elapsed = best_time(fn)
+        print(f"{label:>34}: {elapsed * 1000:7.1f} ms ({base / elapsed:.1f}x)")
@@ -0,0 +1,351 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from mandelbrot_set import (
+    NO_FRACTION,
+    PRECISION_FLOAT32,
+    PRECISION_FLOAT64,
+    mandelbrot_set,
+    mandelbrot_tile,
+    mandelbrot_tile_float32,
+    mandelbrot_tile_subdivide,
+    select_precision,
+)
+
+# 64x64 pikseli - wystarczająco mało, żeby kafelki z wnętrzem zbioru nie blokowały jednego wątku,
+# i wystarczająco dużo, żeby narzut Pythona na kafelek był pomijalny
+DEFAULT_TILE_SIZE = 64
+
+
+def default_thread_count():
+    return multiprocessing.cpu_count()
+
+
+def split_into_tiles(width, height, tile_size=DEFAULT_TILE_SIZE):
+    """
+    Dzieli obraz na prostokątne kafelki.
+
+    Returns:
+        lista krotek (row0, row1, col0, col1) w kolejności wierszami
+    """
+    if tile_size < 1:
+        raise ValueError("Rozmiar kafelka musi byc dodatni.")
+
+    tiles = []
+    for row0 in range(0, height, tile_size):
+        row1 = min(row0 + tile_size, height)
+        for col0 in range(0, width, tile_size):
+            col1 = min(col0 + tile_size, width)
+            tiles.append((row0, row1, col0, col1))
+    return tiles
+
+
+class TileScheduler:
+    """
+    Harmonogram kafelków z podkradaniem pracy (work stealing).
+    Każdy wątek ma własną kolejkę i bierze kafelki z jej początku; gdy ją opróżni,
+    podkrada kafelek z końca najdłuższej cudzej kolejki. Kafelki z wnętrzem zbioru są
+    wielokrotnie droższe od zewnętrznych, więc statyczny podział zostawiałby wątki bezczynne.
+    Operacje popleft()/pop() na deque są atomowe, więc kolejki nie potrzebują blokady.
+    """
+    def __init__(self, tiles, n_workers):
+        if n_workers < 1:
+            raise ValueError("Liczba watkow musi byc dodatnia.")
+
+        self._queues = [deque() for _ in range(n_workers)]
+        # rozdajemy na przemian, żeby każdy wątek dostał kafelki z różnych części obrazu
+        for k, tile in enumerate(tiles):
+            self._queues[k % n_workers].append(tile)
+
+        self._steal_lock = threading.Lock()
+        self.steals = 0
+
+    def next_tile(self, worker_id):
+        """Zwraca kolejny kafelek dla wątku worker_id albo None, gdy praca się skończyła."""
+        try:
+            return self._queues[worker_id].popleft()
+        except IndexError:
+            pass
+
+        victims = sorted(
+            (k for k in range(len(self._queues)) if k != worker_id),
+            key=lambda k: len(self._queues[k]),
+            reverse=True,
+        )
+        for victim in victims:
+            try:
+                tile = self._queues[victim].pop()
+            except IndexError:
+                continue
+            with self._steal_lock:
+                self.steals += 1
+            return tile
+        return None
+
+
+def run_tiles(tile_fn, width, height, n_threads=None, tile_size=DEFAULT_TILE_SIZE, should_cancel=None):
+    """
+    Wykonuje tile_fn(row0, row1, col0, col1) dla wszystkich kafelków obrazu na n_threads wątkach.
+    tile_fn powinna wołać funkcję Numba z nogil=True - inaczej wątki nie będą liczyć równolegle.
+
+    Args:
+        tile_fn: funkcja licząca jeden kafelek (wynik zapisuje sama)
+        width, height: rozmiar obrazu
+        n_threads: liczba wątków (domyślnie liczba rdzeni)
+        tile_size: bok kafelka w pikselach
+        should_cancel: opcjonalna funkcja zwracająca True jeśli liczenie ma być anulowane
+
+    Returns:
+        True jeśli wszystkie kafelki zostały policzone, False jeśli przerwano
+    """
+    if n_threads is None:
+        n_threads = default_thread_count()
+    tiles = split_into_tiles(width, height, tile_size)
+    n_threads = max(1, min(int(n_threads), len(tiles)))
+
+    if n_threads == 1:
+        for tile in tiles:
+            if should_cancel and should_cancel():
+                return False
+            tile_fn(*tile)
+        return True
+
+    scheduler = TileScheduler(tiles, n_threads)
+    cancelled = threading.Event()
+    errors = []
+
+    def worker(worker_id):
+        try:
+            while not cancelled.is_set():
+                if should_cancel and should_cancel():
+                    cancelled.set()
+                    return
+                tile = scheduler.next_tile(worker_id)
+                if tile is None:
+                    return
+                tile_fn(*tile)
+        except Exception as e:
+            errors.append(e)
+            cancelled.set()
+
+    threads = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return not cancelled.is_set()
+
+
+def mandelbrot_set_parallel(
+    xmin, xmax, ymin, ymax, width, height, max_iter,
+    n_threads=None, tile_size=DEFAULT_TILE_SIZE, should_cancel=None, subdivide=False,
+    interior_checks=False, stats=None, preview=False,
+):
+    """
+    Wielowątkowa wersja mandelbrot_set() - obraz dzielony na kafelki rozdzielane dynamicznie.
+    Zwraca tę samą macierz int32 co mandelbrot_set().
+    subdivide=True liczy kafelki podziałem prostokątów (Mariani-Silver) - jednolite obszary
+    zewnętrza wypełniane są bez iterowania, a wnętrze zbioru rozstrzygane skrótami (patrz
+    mandelbrot_tile_subdivide), z wynikiem identycznym jak przy liczeniu każdego piksela.
+    interior_checks=True włącza test kardioidy/koła i wykrywanie okresowości orbity.
+    preview=True (podglądy, miniatury) liczy płytkie widoki szybką ścieżką float32 -
+    wtedy subdivide i interior_checks są pomijane, a wynik może się różnić od float64
+    na pojedynczych pikselach brzegu zbioru.
+
+    Args:
+        stats: opcjonalny słownik uzupełniany o 'precision', 'cardioid' i 'periodic' - liczby pikseli
+            rozstrzygniętych każdym ze skrótów (oraz 'computed' przy subdivide=True)
+
+    Returns:
+        macierz int32 (height, width) lub None jeśli liczenie zostało anulowane
+    """
+    # te same współrzędne co w mandelbrot_set(), żeby wynik był identyczny co do piksela
+    r1 = np.linspace(xmin, xmax, width)
+    r2 = np.linspace(ymin, ymax, height)
+    mset = np.zeros((height, width), dtype=np.int32)
+    tile_stats = []
+    spacing = min(abs(xmax - xmin) / max(width - 1, 1), abs(ymax - ymin) / max(height - 1, 1))
+    precision = PRECISION_FLOAT32 if select_precision(spacing, preview) == PRECISION_FLOAT32 else PRECISION_FLOAT64
+
+    if precision == PRECISION_FLOAT32:
+        known = np.zeros((height, width), dtype=np.bool_)
+
+        def tile_fn(row0, row1, col0, col1):
+            mandelbrot_tile_float32(mset, NO_FRACTION, r1, r2, known, row0, row1, col0, col1, max_iter)
+    elif subdivide:
+        known = np.zeros((height, width), dtype=np.bool_)
+
+        def tile_fn(row0, row1, col0, col1):
+            tile_stats.append(mandelbrot_tile_subdivide(
+                mset, NO_FRACTION, r1, r2, known, row0, row1, col0, col1, max_iter, interior_checks,
+            ))
+    else:
+        def tile_fn(row0, row1, col0, col1):
+            tile_stats.append((0,) + mandelbrot_tile(mset, r1, r2, row0, row1, col0, col1, max_iter, interior_checks))
+
+    completed = run_tiles(tile_fn, width, height, n_threads, tile_size, should_cancel)
+    if stats is not None:
+        stats["precision"] = precision
+        totals = np.sum(np.array(tile_stats, dtype=np.int64).reshape(-1, 3), axis=0)
+        if subdivide and precision == PRECISION_FLOAT64:
+            stats["computed"] = int(totals[0])
+        stats["cardioid"] = int(totals[1])
+        stats["periodic"] = int(totals[2])
+    return mset if completed else None
+
+
+def benchmark_scaling(max_threads=None, width=1000, height=1000, max_iter=1000, repeats=3):
+    """
+    Mierzy skalowanie mandelbrot_set_parallel() dla 1..max_threads wątków na domyślnym widoku.
+
+    Returns:
+        lista krotek (n_threads, najlepszy czas [s], przyspieszenie względem 1 wątku)
+    """
+    if max_threads is None:
+        max_threads = default_thread_count()
+    view = (-2.0, 1.0, -1.5, 1.5)
+
+    # kompilacja Numba poza pomiarem
+    reference = mandelbrot_set(*view, 64, 64, 10)
+    mandelbrot_set_parallel(*view, 64, 64, 10, n_threads=1)
+    if not np.array_equal(reference, mandelbrot_set_parallel(*view, 64, 64, 10, n_threads=2)):
+        raise RuntimeError("Wynik rownolegly rozni sie od mandelbrot_set().")
+
+    results = []
+    base_time = None
+    for n_threads in range(1, max_threads + 1):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads)
+            best = min(best, time.perf_counter() - start)
+        if base_time is None:
+            base_time = best
+        results.append((n_threads, best, base_time / best))
+    return results
+
+
+# Standardowe widoki do porównań: cały zbiór, Dolina Konika Morskiego, Dolina Słonia, antena
+BENCHMARK_VIEWS = {
+    "caly zbior": (-2.0, 1.0, -1.5, 1.5),
+    "konik morski": (-0.8, -0.7, 0.05, 0.15),
+    "slon": (0.25, 0.35, -0.05, 0.05),
+    "antena": (-1.8, -1.7, -0.05, 0.05),
+}
+
+
+def benchmark_subdivision(width=1000, height=1000, max_iter=1000, n_threads=None):
+    """
+    Porównuje podział prostokątów (Mariani-Silver) z liczeniem każdego piksela na BENCHMARK_VIEWS.
+
+    Returns:
+        lista krotek (widok, czas brute force [s], czas z podziałem [s], liczba różniących się pikseli)
+    """
+    mandelbrot_set_parallel(-2.0, 1.0, -1.5, 1.5, 64, 64, 10, subdivide=True)
+    mandelbrot_set_parallel(-2.0, 1.0, -1.5, 1.5, 64, 64, 10)
+
+    results = []
+    for name, view in BENCHMARK_VIEWS.items():
+        start = time.perf_counter()
+        brute = mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads)
+        brute_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        subdivided = mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads, subdivide=True)
+        subdivide_time = time.perf_counter() - start
+
+        results.append((name, brute_time, subdivide_time, int(np.count_nonzero(brute != subdivided))))
+    return results
+
+
+def benchmark_interior(width=1000, height=1000, max_iter=1000, n_threads=None):
+    """
+    Porównuje liczenie ze skrótami dla wnętrza (kardioida/koło, okresowość) i bez nich
+    na widokach z dużą częścią wnętrza zbioru.
+
+    Returns:
+        lista krotek (widok, czas bez skrótów [s], czas ze skrótami [s],
+        piksele z testu kardioidy, piksele z okresowości, liczba różniących się pikseli)
+    """
+    views = {"caly zbior": BENCHMARK_VIEWS["caly zbior"], "wnetrze": (-1.0, 0.0, -0.5, 0.5)}
+    mandelbrot_set_parallel(-2.0, 1.0, -1.5, 1.5, 64, 64, 10, interior_checks=True)
+
+    results = []
+    for name, view in views.items():
+        start = time.perf_counter()
+        plain = mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads)
+        plain_time = time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        checked = mandelbrot_set_parallel(
+            *view, width, height, max_iter, n_threads=n_threads, interior_checks=True, stats=stats,
+        )
+        checked_time = time.perf_counter() - start
+
+        results.append((
+            name, plain_time, checked_time, stats["cardioid"], stats["periodic"],
+            int(np.count_nonzero(plain != checked)),
+        ))
+    return results
+
+
+def benchmark_float32(width=1000, height=1000, max_iter=1000, n_threads=None):
+    """
+    Porównuje szybką ścieżkę float32 (preview=True) z float64 na płytkich widokach z BENCHMARK_VIEWS.
+
+    Returns:
+        lista krotek (widok, czas float64 [s], czas float32 [s], odsetek różniących się pikseli)
+    """
+    mandelbrot_set_parallel(-2.0, 1.0, -1.5, 1.5, 64, 64, 10)
+    mandelbrot_set_parallel(-2.0, 1.0, -1.5, 1.5, 64, 64, 10, preview=True)
+
+    results = []
+    for name, view in BENCHMARK_VIEWS.items():
+        start = time.perf_counter()
+        exact = mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads)
+        float64_time = time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        fast = mandelbrot_set_parallel(*view, width, height, max_iter, n_threads=n_threads, preview=True, stats=stats)
+        float32_time = time.perf_counter() - start
+        if stats["precision"] != PRECISION_FLOAT32:
+            raise RuntimeError(f"Widok {name} nie zostal policzony w float32.")
+
+        results.append((name, float64_time, float32_time, np.count_nonzero(exact != fast) / exact.size))
+    return results
+
+
+if __name__ == "__main__":
+    print(f"Skalowanie silnika kafelkowego (1000x1000, max_iter=1000, rdzenie: {default_thread_count()})")
+    print(f"{'watki':>6} {'czas [s]':>10} {'przysp.':>8} {'efekt.':>7}")
+    for n, elapsed, speedup in benchmark_scaling():
+        print(f"{n:>6} {elapsed:>10.3f} {speedup:>8.2f} {speedup / n:>7.0%}")
+
+    print("\nPodzial prostokatow (Mariani-Silver) vs kazdy piksel (1000x1000, max_iter=1000)")
+    print(f"{'widok':>14} {'brute [s]':>10} {'podzial [s]':>12} {'przysp.':>8} {'rozne px':>9}")
+    for name, brute_time, subdivide_time, mismatches in benchmark_subdivision():
+        print(f"{name:>14} {brute_time:>10.3f} {subdivide_time:>12.3f} {brute_time / subdivide_time:>8.2f} {mismatches:>9}")
+        if mismatches:
+            raise RuntimeError(f"Podzial prostokatow rozni sie od liczenia kazdego piksela ({name}).")
+
+    print("\nSkroty dla wnetrza (kardioida/okresowosc) vs pelna iteracja (1000x1000, max_iter=1000)")
+    print(f"{'widok':>14} {'bez [s]':>10} {'ze skr. [s]':>12} {'przysp.':>8} {'kardioida':>10} {'okres.':>8} {'rozne px':>9}")
+    for name, plain_time, checked_time, cardioid, periodic, mismatches in benchmark_interior():
+        print(
+            f"{name:>14} {plain_time:>10.3f} {checked_time:>12.3f} {plain_time / checked_time:>8.2f} "
+            f"{cardioid:>10} {periodic:>8} {mismatches:>9}"
+        )
+
+    print("\nSciezka float32 (preview=True) vs float64 (1000x1000, max_iter=1000)")
+    print(f"{'widok':>14} {'float64 [s]':>12} {'float32 [s]':>12} {'przysp.':>8} {'rozne px':>9}")
+    for name, float64_time, float32_time, mismatch in benchmark_float32():
+        print(f"{name:>14} {float64_time:>12.3f} {float32_time:>12.3f} {float64_time / float32_time:>8.2f} {mismatch:>9.2%}")
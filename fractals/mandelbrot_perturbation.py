@@ -0,0 +1,93 @@
+import math
+from decimal import Decimal, localcontext
+
+import numpy as np
+from numba import jit
+
+from mandelbrot_set import smooth_fraction
+
+# Różnice dz i odstęp pikseli muszą pozostać liczbami normalnymi float64 - stąd granica głębokości
+MIN_PIXEL_SPACING = 1e-300
+
+
+def decimal_digits_for(pixel_spacing):
+    """Liczba cyfr dziesiętnych potrzebna, żeby rozróżnić sąsiednie piksele (z zapasem)."""
+    return max(30, int(math.ceil(-math.log10(pixel_spacing))) + 20)
+
+
+def reference_orbit(c_re, c_im, max_iter, digits):
+    """
+    Liczy orbitę punktu odniesienia w wysokiej precyzji (Decimal) i zapisuje ją w float64.
+    Orbita kończy się po ucieczce (|Z| > 2) albo po max_iter krokach.
+
+    Args:
+        c_re, c_im: punkt odniesienia (Decimal lub str)
+        max_iter: maksymalna liczba iteracji
+        digits: precyzja obliczeń w cyfrach dziesiętnych
+
+    Returns:
+        (zr, zi) - tablice float64 z Z_0 = 0, Z_1 = c, ... (długość <= max_iter + 1)
+    """
+    zr = np.zeros(max_iter + 1, dtype=np.float64)
+    zi = np.zeros(max_iter + 1, dtype=np.float64)
+
+    with localcontext() as ctx:
+        ctx.prec = digits
+        c_re = Decimal(c_re)
+        c_im = Decimal(c_im)
+        x = Decimal(0)
+        y = Decimal(0)
+        length = 1
+        for n in range(1, max_iter + 1):
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > 4:
+                break
+            x, y = x2 - y2 + c_re, 2 * x * y + c_im
+            zr[n] = float(x)
+            zi[n] = float(y)
+            length = n + 1
+
+    return zr[:length], zi[:length]
+
+
+@jit(nopython=True, nogil=True)
+def perturbation_tile(mset, fraction, known, zr, zi, dcr, dci, row0, row1, col0, col1, max_iter):
+    """
+    Liczy kafelek metodą perturbacji: piksel to mała różnica dz względem orbity odniesienia Z,
+    dz_{n+1} = (2 Z_n + dz_n) dz_n + dc - wszystko w zwykłym float64.
+    Gdy |Z_m + dz| < |dz| (zaczyna się utrata precyzji, tzw. glitch) albo orbita odniesienia
+    się skończyła, piksel przechodzi na początek orbity (rebase): dz = Z_m + dz, m = 0.
+    fraction jak w mandelbrot_tile_masked() - część ułamkowa iteracji do gładkiego kolorowania.
+
+    Returns:
+        liczba wykonanych przełączeń (rebase) w kafelku
+    """
+    ref_last = len(zr) - 1
+    smooth = fraction.shape[0] > 0
+    rebases = 0
+    for i in range(row0, row1):
+        for j in range(col0, col1):
+            if known[i, j]:
+                continue
+            dc = complex(dcr[j], dci[i])
+            dz = 0j
+            m = 0
+            n = 0
+            z_mag = 0.0
+            while n < max_iter:
+                dz = (2.0 * complex(zr[m], zi[m]) + dz) * dz + dc
+                m += 1
+                n += 1
+                z = complex(zr[m], zi[m]) + dz
+                z_mag = z.real * z.real + z.imag * z.imag
+                if z_mag > 4.0 or n == max_iter:
+                    break
+                if m == ref_last or z_mag < dz.real * dz.real + dz.imag * dz.imag:
+                    dz = z
+                    m = 0
+                    rebases += 1
+            mset[i, j] = n
+            if smooth:
+                fraction[i, j] = smooth_fraction(z_mag) if n < max_iter else 0.0
+    return rebases
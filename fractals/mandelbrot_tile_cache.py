@@ -0,0 +1,100 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# Bok kafelka pamięci podręcznej w pikselach (jak kafelki silnika - wnętrze widoku to całe kafelki)
+CACHE_TILE_SIZE = 64
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# Ile poziomów drobniejszych wolno zejść, budując kafelek z drobniejszych
+MAX_BUILD_DEPTH = 3
+
+
+class TileCache:
+    """
+    Ograniczona pamięcią podręczna policzonych kafelków Mandelbrota z usuwaniem najdawniej
+    używanych (LRU). Klucz to (poziom, tx, ty) + wariant renderu (max_iter, precyzja, subdivide):
+    poziom L ma odstęp pikseli 2^-L odstępu bazowego, a kafelek (tx, ty) obejmuje próbki siatki o indeksach
+    [tx*T, (tx+1)*T) x [ty*T, (ty+1)*T). Próbka k poziomu L to ten sam punkt co próbka 2k
+    poziomu L+1, więc brakujący kafelek grubszy da się złożyć z czterech drobniejszych
+    (co druga próbka) - oddalenie do już oglądanego obszaru nie wymaga liczenia.
+    """
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, tile_size=CACHE_TILE_SIZE):
+        if max_bytes <= 0 or tile_size < 1:
+            raise ValueError("Rozmiar pamieci podrecznej i kafelka musza byc dodatnie.")
+        self.max_bytes = max_bytes
+        self.tile_size = tile_size
+        self._tiles = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.built = 0
+
+    def __len__(self):
+        return len(self._tiles)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._tiles.clear()
+        self.memory_bytes = 0
+
+    def put(self, key, mset, fraction=None):
+        """
+        Zapamiętuje kopię kafelka (T x T) wraz z opcjonalną częścią ułamkową iteracji.
+        Przy przekroczeniu max_bytes usuwa najdawniej używane kafelki.
+        """
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            old_mset, old_fraction = self._tiles[key]
+            if old_fraction is not None or fraction is None:
+                return
+            self.memory_bytes -= old_mset.nbytes
+        tile = (mset.copy(), None if fraction is None else fraction.copy())
+        self._tiles[key] = tile
+        self.memory_bytes += sum(a.nbytes for a in tile if a is not None)
+        while self.memory_bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self.memory_bytes -= sum(a.nbytes for a in evicted if a is not None)
+
+    def get(self, key, smooth=False):
+        """
+        Zwraca (mset, fraction) kafelka albo None. Brakujący kafelek składany jest, jeśli się da,
+        z czterech kafelków poziomu drobniejszego (i zapamiętywany).
+        smooth=True wymaga kafelka z częścią ułamkową iteracji.
+        """
+        tile = self._lookup(key, smooth, MAX_BUILD_DEPTH)
+        if tile is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tile
+
+    def _lookup(self, key, smooth, depth):
+        tile = self._tiles.get(key)
+        if tile is not None and (tile[1] is not None or not smooth):
+            self._tiles.move_to_end(key)
+            return tile
+        if depth == 0:
+            return None
+
+        level, tx, ty = key[:3]
+        variant = key[3:]
+        quarters = []
+        for dy in (0, 1):
+            for dx in (0, 1):
+                finer = self._lookup((level + 1, 2 * tx + dx, 2 * ty + dy) + variant, smooth, depth - 1)
+                if finer is None:
+                    return None
+                quarters.append(finer)
+
+        # kafelek drobniejszy (2*ty + dy, 2*tx + dx) to ćwiartka bloku 2T x 2T; bierzemy co drugą próbkę
+        mset = np.block([[quarters[0][0], quarters[1][0]], [quarters[2][0], quarters[3][0]]])[::2, ::2]
+        fraction = None
+        if smooth:
+            fraction = np.block([[quarters[0][1], quarters[1][1]], [quarters[2][1], quarters[3][1]]])[::2, ::2]
+        self.built += 1
+        self.put(key, mset, fraction)
+        return self._tiles[key]
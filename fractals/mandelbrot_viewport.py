@@ -0,0 +1,508 @@
+import math
+from decimal import Decimal, getcontext, localcontext
+
+import numpy as np
+
+from mandelbrot_engine import DEFAULT_TILE_SIZE, run_tiles
+from mandelbrot_perturbation import MIN_PIXEL_SPACING, decimal_digits_for, perturbation_tile, reference_orbit
+from mandelbrot_set import (
+    PRECISION_AUTO,
+    PRECISION_DOUBLE_DOUBLE,
+    PRECISION_FLOAT32,
+    PRECISION_FLOAT64,
+    PRECISION_PERTURBATION,
+    NO_FRACTION,
+    dd_coordinates,
+    mandelbrot_tile_dd,
+    mandelbrot_tile_float32,
+    mandelbrot_tile_resume,
+    mandelbrot_tile_subdivide,
+    select_precision,
+)
+
+DEFAULT_BOUNDS = (-2.0, 1.0, -1.5, 1.5)
+
+# Tolerancja (w pikselach starej siatki), z jaką nowa próbka musi trafić w starą, żeby ją przepisać
+_GRID_TOLERANCE = 1e-3
+# Pierwszy przebieg renderu progresywnego ma mieć około tylu próbek na bok
+_PREVIEW_SAMPLES = 32
+
+# Automatyczny dobór max_iter (estimate_max_iter): bok renderu próbnego, budżet dla widoku
+# domyślnego i jego przyrost na każde dwukrotne przybliżenie, dopuszczalny odsetek pikseli spoza
+# zbioru, które przy dobranym budżecie nie zdążą uciec, i górna granica budżetu
+AUTO_PROBE_SIZE = 64
+AUTO_MIN_ITER = 100
+AUTO_ITER_PER_OCTAVE = 25
+AUTO_UNRESOLVED_FRACTION = 0.005
+AUTO_MAX_ITER = 100000
+# Przy każdym kolejnym przebiegu próbnym limit iteracji rośnie tyle razy
+_AUTO_PROBE_GROWTH = 4
+
+
+def _grid_mapping(new_origin, new_step, old_origin, old_step, new_size, old_size):
+    """
+    Dopasowuje jedną oś nowej siatki próbek do starej.
+    Początki osi są typu Decimal - różnica liczona dokładnie także przy głębokim przybliżeniu.
+
+    Returns:
+        (indeksy w nowej siatce, odpowiadające im indeksy w starej siatce)
+    """
+    with localcontext() as ctx:
+        ctx.prec = decimal_digits_for(min(new_step, old_step))
+        offset = float((new_origin - old_origin) / Decimal(old_step))
+    ratio = new_step / old_step
+    u = offset + np.arange(new_size) * ratio
+    idx = np.rint(u)
+    # tolerancja w jednostkach drobniejszej z siatek - przy dużym przybliżeniu wiele nowych
+    # próbek mieści się w jednym starym pikselu, ale tylko jedna (lub żadna) trafia w jego środek
+    tolerance = _GRID_TOLERANCE * min(1.0, ratio)
+    on_grid = (np.abs(u - idx) < tolerance) & (idx >= 0) & (idx < old_size)
+    return np.nonzero(on_grid)[0], idx[on_grid].astype(np.intp)
+
+
+class MandelbrotViewport:
+    """
+    Aktualny widok zbioru Mandelbrota (przesuwanie/przybliżanie) wraz z ostatnio policzonym obrazem.
+    Próbki leżą na siatce x = x0 + j*dx, y = y0 + i*dy (wiersz 0 = ymin, jak w mandelbrot_set()).
+    Przy kolejnym renderowaniu piksele trafiające w starą siatkę są przepisywane, a liczone są tylko
+    nowe - po przesunięciu to sam odsłonięty pas, po przybliżeniu 2x co czwarty piksel jest gotowy.
+    x0, y0 są typu Decimal, więc widok da się przybliżać daleko poza precyzję float64
+    (wtedy render() przechodzi na double-double, a głębiej na perturbację).
+
+    Z tile_cache (TileCache) policzone kafelki są zapamiętywane na siatce zakotwiczonej w widoku
+    z reset() - przybliżanie 2x i przesuwanie o całe piksele zostawia widok na tej siatce,
+    a przy oddalaniu jest on do niej dociągany (o mniej niż pół piksela). Powrót do oglądanego
+    wcześniej obszaru lub oddalenie nie wymaga wtedy liczenia.
+    """
+    def __init__(self, width=1000, height=1000, bounds=DEFAULT_BOUNDS, tile_cache=None):
+        self.width = width
+        self.height = height
+        self.tile_cache = tile_cache
+        self._lattice = None
+        self._image = None
+        self._image_grid = None
+        self.fraction = None
+        self._orbit = None
+        self.last_reused = 0
+        self.last_stats = {}
+        self.reset(bounds)
+
+    def reset(self, bounds=DEFAULT_BOUNDS):
+        xmin, xmax, ymin, ymax = bounds
+        if xmax <= xmin or ymax <= ymin:
+            raise ValueError("Nieprawidlowy zakres widoku.")
+        self.x0 = Decimal(xmin)
+        self.y0 = Decimal(ymin)
+        self.dx = (xmax - xmin) / (self.width - 1)
+        self.dy = (ymax - ymin) / (self.height - 1)
+
+        # siatka pamięci podręcznej zakotwiczona w tym widoku - inna siatka unieważnia kafelki
+        lattice = (self.x0, self.y0, self.dx, self.dy)
+        if self.tile_cache is not None and lattice != self._lattice:
+            self.tile_cache.clear()
+        self._lattice = lattice
+
+    def _context(self):
+        ctx = getcontext().copy()
+        ctx.prec = decimal_digits_for(min(self.dx, self.dy))
+        return localcontext(ctx)
+
+    @property
+    def bounds(self):
+        """Zakres widoku w float64 (xmin, xmax, ymin, ymax)."""
+        with self._context():
+            return (
+                float(self.x0),
+                float(self.x0 + (self.width - 1) * Decimal(self.dx)),
+                float(self.y0),
+                float(self.y0 + (self.height - 1) * Decimal(self.dy)),
+            )
+
+    @property
+    def center(self):
+        """Środek widoku w pełnej precyzji (Decimal, Decimal)."""
+        with self._context():
+            return (
+                self.x0 + Decimal(self.width - 1) / 2 * Decimal(self.dx),
+                self.y0 + Decimal(self.height - 1) / 2 * Decimal(self.dy),
+            )
+
+    @property
+    def precision(self):
+        """Precyzja dobierana automatycznie do odstępu pikseli."""
+        return select_precision(min(self.dx, self.dy))
+
+    def pan(self, d_cols, d_rows):
+        """Przesuwa widok o całkowitą liczbę pikseli (kolumny w prawo, wiersze w stronę ymax)."""
+        with self._context():
+            self.x0 += int(d_cols) * Decimal(self.dx)
+            self.y0 += int(d_rows) * Decimal(self.dy)
+
+    def zoom(self, factor, col=None, row=None):
+        """
+        Przybliża widok factor razy (factor < 1 oddala), zachowując piksel (col, row) w miejscu.
+        Domyślnie wokół środka obrazu.
+        """
+        if factor <= 0:
+            raise ValueError("Wspolczynnik przyblizenia musi byc dodatni.")
+        col = (self.width - 1) // 2 if col is None else int(col)
+        row = (self.height - 1) // 2 if row is None else int(row)
+
+        with self._context():
+            x_fixed = self.x0 + col * Decimal(self.dx)
+            y_fixed = self.y0 + row * Decimal(self.dy)
+        self.dx /= factor
+        self.dy /= factor
+        with self._context():
+            self.x0 = x_fixed - col * Decimal(self.dx)
+            self.y0 = y_fixed - row * Decimal(self.dy)
+        if self.tile_cache is not None:
+            self._snap_to_lattice()
+
+    def _lattice_position(self):
+        """
+        Położenie widoku na siatce pamięci podręcznej: (poziom, ix0, iy0) z niezaokrąglonymi
+        indeksami (Decimal) pierwszej próbki, albo None, gdy odstęp pikseli nie jest 2^-poziom
+        odstępu bazowego (np. po przybliżeniu o inny współczynnik niż potęga dwójki).
+        """
+        anchor_x, anchor_y, base_dx, base_dy = self._lattice
+        level = round(math.log2(base_dx / self.dx))
+        if math.ldexp(base_dx, -level) != self.dx or math.ldexp(base_dy, -level) != self.dy:
+            return None
+        with self._context():
+            return level, (self.x0 - anchor_x) / Decimal(self.dx), (self.y0 - anchor_y) / Decimal(self.dy)
+
+    def _snap_to_lattice(self):
+        """Dociąga początek widoku do najbliższej próbki siatki pamięci podręcznej."""
+        position = self._lattice_position()
+        if position is None:
+            return
+        _, ix, iy = position
+        anchor_x, anchor_y = self._lattice[:2]
+        with self._context():
+            self.x0 = anchor_x + ix.to_integral_value() * Decimal(self.dx)
+            self.y0 = anchor_y + iy.to_integral_value() * Decimal(self.dy)
+
+    def _cache_tiles(self):
+        """
+        Kafelki pamięci podręcznej pokrywające widok: lista krotek (klucz bez wariantu renderu,
+        wycinek macierzy widoku, wycinek kafelka, czy kafelek leży w widoku w całości).
+        Pusta, gdy widok nie leży na siatce.
+        """
+        if self.tile_cache is None:
+            return []
+        position = self._lattice_position()
+        if position is None:
+            return []
+        level, ix, iy = position
+        ix0, iy0 = int(ix.to_integral_value()), int(iy.to_integral_value())
+        if abs(ix - ix0) > _GRID_TOLERANCE or abs(iy - iy0) > _GRID_TOLERANCE:
+            return []
+
+        size = self.tile_cache.tile_size
+        tiles = []
+        for ty in range(iy0 // size, (iy0 + self.height - 1) // size + 1):
+            row0, row1 = max(ty * size, iy0), min((ty + 1) * size, iy0 + self.height)
+            for tx in range(ix0 // size, (ix0 + self.width - 1) // size + 1):
+                col0, col1 = max(tx * size, ix0), min((tx + 1) * size, ix0 + self.width)
+                tiles.append((
+                    (level, tx, ty),
+                    np.s_[row0 - iy0:row1 - iy0, col0 - ix0:col1 - ix0],
+                    np.s_[row0 - ty * size:row1 - ty * size, col0 - tx * size:col1 - tx * size],
+                    row1 - row0 == size and col1 - col0 == size,
+                ))
+        return tiles
+
+    def _fill_from_cache(self, tiles, mset, fraction, orbit, known, variant):
+        """
+        Przepisuje brakujące fragmenty widoku z pamięci podręcznej; zwraca liczbę użytych kafelków.
+        variant (max_iter, precyzja, subdivide) dopełnia klucz - kafelki z wypełnionymi
+        prostokątami nie mieszają się z liczonymi piksel po pikselu.
+        Kafelki nie przechowują stanu orbity, więc te piksele przy kontynuacji liczone są od z = 0.
+        """
+        smooth = fraction.shape[0] > 0
+        used = 0
+        for key, view_part, tile_part, _ in tiles:
+            if known[view_part].all():
+                continue
+            tile = self.tile_cache.get(key + variant, smooth)
+            if tile is None:
+                continue
+            mset[view_part] = tile[0][tile_part]
+            if smooth:
+                fraction[view_part] = tile[1][tile_part]
+            if orbit is not None:
+                orbit[0][view_part] = np.nan
+            known[view_part] = True
+            used += 1
+        return used
+
+    def _resume_previous(self, max_iter, precision, smooth):
+        """
+        Stan do kontynuacji po zwiększeniu max_iter na niezmienionym widoku (tylko float64):
+        (mset, fraction, known, orbit) albo None. Piksele, które uciekły, są ostateczne (known),
+        pozostałe kontynuują od zapamiętanego z - zamiast liczyć wszystko od nowa.
+        """
+        if self._orbit is None or self._image_grid[:4] != (self.x0, self.y0, self.dx, self.dy):
+            return None
+        old_max_iter, old_precision = self._image_grid[4:]
+        if precision != old_precision or max_iter <= old_max_iter or (smooth and self.fraction is None):
+            return None
+
+        # kopie - anulowany render nie może zepsuć zapamiętanego stanu
+        mset = self._image.copy()
+        known = mset < old_max_iter
+        fraction = self.fraction.copy() if smooth else NO_FRACTION
+        orbit = (self._orbit[0].copy(), self._orbit[1].copy())
+        return mset, fraction, known, orbit
+
+    def _reuse_previous(self, mset, fraction, orbit, known, max_iter, precision):
+        self.last_reused = 0
+        if self._image is None or self._image_grid[4:] != (max_iter, precision):
+            return
+        smooth = fraction.shape[0] > 0
+        if smooth and self.fraction is None:
+            return
+
+        old_x0, old_y0, old_dx, old_dy = self._image_grid[:4]
+        new_cols, old_cols = _grid_mapping(self.x0, self.dx, old_x0, old_dx, self.width, self.width)
+        new_rows, old_rows = _grid_mapping(self.y0, self.dy, old_y0, old_dy, self.height, self.height)
+        if len(new_cols) == 0 or len(new_rows) == 0:
+            return
+
+        mset[np.ix_(new_rows, new_cols)] = self._image[np.ix_(old_rows, old_cols)]
+        if smooth:
+            fraction[np.ix_(new_rows, new_cols)] = self.fraction[np.ix_(old_rows, old_cols)]
+        if orbit is not None and self._orbit is not None:
+            for new, old in zip(orbit, self._orbit):
+                new[np.ix_(new_rows, new_cols)] = old[np.ix_(old_rows, old_cols)]
+        known[np.ix_(new_rows, new_cols)] = True
+        self.last_reused = len(new_rows) * len(new_cols)
+
+    def _tile_kernel(self, precision, max_iter, subdivide, interior_checks, orbit):
+        """
+        Przygotowuje dane wspólne dla całego renderu (współrzędne, orbita odniesienia) i zwraca
+        compute(mset, fraction, known, stride, row0, row1, col0, col1) liczącą kafelek pod-siatki
+        co stride pikseli. mset, fraction i known to wtedy widoki [::stride, ::stride], więc zapis
+        trafia do pełnych macierzy.
+        compute zwraca słownik liczników kafelka (sumowanych potem do last_stats).
+        subdivide (podział prostokątów) i interior_checks (skróty dla wnętrza) dotyczą float64,
+        podobnie jak orbit - pełnowymiarowe (orbit_re, orbit_im) na stan orbity pikseli.
+        """
+        if precision == PRECISION_PERTURBATION:
+            if min(self.dx, self.dy) < MIN_PIXEL_SPACING:
+                raise ValueError(f"Zbyt duze przyblizenie (odstep pikseli < {MIN_PIXEL_SPACING:g}).")
+            center_re, center_im = self.center
+            zr, zi = reference_orbit(center_re, center_im, max_iter, decimal_digits_for(min(self.dx, self.dy)))
+            dcr = (np.arange(self.width) - (self.width - 1) / 2.0) * self.dx
+            dci = (np.arange(self.height) - (self.height - 1) / 2.0) * self.dy
+            self.last_stats["reference_length"] = len(zr)
+
+            def compute(mset, fraction, known, stride, row0, row1, col0, col1):
+                rebases = perturbation_tile(
+                    mset, fraction, known, zr, zi, dcr[::stride], dci[::stride], row0, row1, col0, col1, max_iter,
+                )
+                return {"rebases": rebases}
+        elif precision == PRECISION_DOUBLE_DOUBLE:
+            r1_hi, r1_lo = dd_coordinates(self.x0, self.dx, self.width)
+            r2_hi, r2_lo = dd_coordinates(self.y0, self.dy, self.height)
+
+            def compute(mset, fraction, known, stride, row0, row1, col0, col1):
+                mandelbrot_tile_dd(
+                    mset, fraction, known, r1_hi[::stride], r1_lo[::stride], r2_hi[::stride], r2_lo[::stride],
+                    row0, row1, col0, col1, max_iter,
+                )
+                return {}
+        elif precision == PRECISION_FLOAT64:
+            xmin, xmax, ymin, ymax = self.bounds
+            r1 = np.linspace(xmin, xmax, self.width)
+            r2 = np.linspace(ymin, ymax, self.height)
+
+            orbit_re, orbit_im = orbit
+
+            def compute(mset, fraction, known, stride, row0, row1, col0, col1):
+                # podgląd progresywny jest rzadki, więc podział prostokątów stosujemy tylko w pełnej rozdzielczości
+                if subdivide and stride == 1:
+                    # podział nie zapisuje stanu orbity - przy kontynuacji kafelek liczony będzie od z = 0
+                    orbit_re[row0:row1, col0:col1] = np.nan
+                    computed, cardioid, periodic = mandelbrot_tile_subdivide(
+                        mset, fraction, r1, r2, known, row0, row1, col0, col1, max_iter, interior_checks,
+                    )
+                    return {"computed": computed, "cardioid": cardioid, "periodic": periodic}
+                cardioid, periodic = mandelbrot_tile_resume(
+                    mset, fraction, orbit_re[::stride, ::stride], orbit_im[::stride, ::stride],
+                    r1[::stride], r2[::stride], known, row0, row1, col0, col1, max_iter, interior_checks,
+                )
+                return {"cardioid": cardioid, "periodic": periodic}
+        elif precision == PRECISION_FLOAT32:
+            xmin, xmax, ymin, ymax = self.bounds
+            r1 = np.linspace(xmin, xmax, self.width)
+            r2 = np.linspace(ymin, ymax, self.height)
+
+            def compute(mset, fraction, known, stride, row0, row1, col0, col1):
+                mandelbrot_tile_float32(
+                    mset, fraction, r1[::stride], r2[::stride], known, row0, row1, col0, col1, max_iter,
+                )
+                return {}
+        else:
+            raise ValueError(f"Nieobslugiwana precyzja: {precision}")
+        return compute
+
+    def _pass_strides(self):
+        """Kroki kolejnych przebiegów progresywnych, np. 32, 16, 8, 4, 2, 1 dla 1000x1000."""
+        stride = 1
+        while max(self.width, self.height) / stride > _PREVIEW_SAMPLES:
+            stride *= 2
+        strides = []
+        while stride >= 1:
+            strides.append(stride)
+            stride //= 2
+        return strides
+
+    def estimate_max_iter(self, n_threads=None, should_cancel=None, stats=None):
+        """
+        Dobiera budżet iteracji dla aktualnego widoku na podstawie głębokości przybliżenia
+        i rozkładu liczby iteracji w tanim renderze próbnym AUTO_PROBE_SIZE x AUTO_PROBE_SIZE.
+
+        Dolna granica rośnie o AUTO_ITER_PER_OCTAVE na każde dwukrotne przybliżenie względem
+        widoku domyślnego. Render próbny (ze skrótami dla wnętrza) liczony jest z limitem
+        zwiększanym _AUTO_PROBE_GROWTH razy - każdy kolejny przebieg kontynuuje orbity
+        poprzedniego - aż nierozstrzygniętych pikseli (nie uciekły i nie rozpoznano ich jako wnętrza)
+        zostanie najwyżej AUTO_UNRESOLVED_FRACTION albo ostatni przebieg prawie niczego nie rozstrzygnie.
+        Budżet to kwantyl 1 - AUTO_UNRESOLVED_FRACTION liczby iteracji pikseli spoza zbioru:
+        odsetek pikseli o danej liczbie iteracji nie zależy od rozdzielczości, więc przy pełnym
+        renderze uciekną prawie wszystkie piksele spoza zbioru, a wnętrze nie dostanie nadmiaru iteracji.
+
+        Args:
+            stats: opcjonalny słownik uzupełniany o 'zoom_floor', 'probe_limit' i 'unresolved'
+                (odsetek nierozstrzygniętych pikseli próbki)
+
+        Returns:
+            liczba iteracji albo None jeśli przerwano
+        """
+        default_width = DEFAULT_BOUNDS[1] - DEFAULT_BOUNDS[0]
+        octaves = max(0.0, math.log2(default_width / (self.dx * (self.width - 1))))
+        floor = AUTO_MIN_ITER + int(AUTO_ITER_PER_OCTAVE * octaves)
+
+        probe = MandelbrotViewport(AUTO_PROBE_SIZE, AUTO_PROBE_SIZE)
+        probe.x0, probe.y0 = self.x0, self.y0
+        probe.dx = self.dx * (self.width - 1) / (AUTO_PROBE_SIZE - 1)
+        probe.dy = self.dy * (self.height - 1) / (AUTO_PROBE_SIZE - 1)
+        total = AUTO_PROBE_SIZE * AUTO_PROBE_SIZE
+        allowed = AUTO_UNRESOLVED_FRACTION * total
+
+        limit = min(2 * floor, AUTO_MAX_ITER)
+        escaped_before = 0
+        while True:
+            mset = probe.render(limit, n_threads=n_threads, should_cancel=should_cancel, interior_checks=True)
+            if mset is None:
+                return None
+            escaped = np.sort(mset[mset < limit])
+            interior = probe.last_stats.get("cardioid", 0) + probe.last_stats.get("periodic", 0)
+            unresolved = total - len(escaped) - interior
+            if unresolved <= allowed or limit >= AUTO_MAX_ITER or len(escaped) - escaped_before <= allowed:
+                break
+            escaped_before = len(escaped)
+            limit = min(limit * _AUTO_PROBE_GROWTH, AUTO_MAX_ITER)
+
+        budget = floor
+        exterior = len(escaped) + max(unresolved, 0)
+        if len(escaped):
+            rank = min(math.ceil((1.0 - AUTO_UNRESOLVED_FRACTION) * exterior), len(escaped)) - 1
+            budget = max(budget, int(escaped[rank]) + 1)
+        # zaokrąglenie w górę do dwóch cyfr znaczących - stabilny budżet przy drobnych zmianach widoku
+        step = 10 ** max(0, len(str(budget)) - 2)
+        budget = min(-(-budget // step) * step, AUTO_MAX_ITER)
+
+        if stats is not None:
+            stats["zoom_floor"] = floor
+            stats["probe_limit"] = limit
+            stats["unresolved"] = max(unresolved, 0) / total
+        return budget
+
+    def render(
+        self, max_iter, n_threads=None, should_cancel=None, precision=PRECISION_AUTO, on_pass=None,
+        subdivide=False, interior_checks=False, smooth=False, preview=False,
+    ):
+        """
+        Liczy obraz aktualnego widoku, wykorzystując piksele z poprzedniego obrazu.
+        PRECISION_AUTO wybiera float64 / double-double / perturbację wg odstępu pikseli,
+        a z preview=True na płytkich widokach szybką ścieżkę float32 (patrz select_precision).
+        Statystyki (użyta precyzja, dane perturbacji, liczba kafelków z pamięci podręcznej
+        'cache_tiles') trafiają do last_stats.
+
+        Z on_pass render jest progresywny: najpierw co stride-ty piksel (podgląd ~32x32 próbek),
+        potem coraz gęściej - każdy przebieg liczy tylko próbki, których jeszcze nie ma.
+        Po każdym przebiegu oprócz ostatniego wywoływane jest on_pass(podgląd, stride),
+        gdzie podgląd to pełnowymiarowa macierz z próbkami powielonymi na bloki stride x stride.
+        subdivide=True (tylko float64) wypełnia jednolite prostokąty bez iterowania - liczba
+        faktycznie iterowanych pikseli trafia do last_stats['computed'].
+        interior_checks=True (tylko float64) włącza test kardioidy/koła i wykrywanie okresowości -
+        liczba pikseli rozstrzygniętych każdym skrótem trafia do last_stats['cardioid'] i ['periodic'].
+        smooth=True liczy dodatkowo część ułamkową iteracji (atrybut fraction, float32) do gładkiego
+        kolorowania - bez tego fraction jest None.
+        Po zwiększeniu max_iter na tym samym widoku (float64) piksele, które już uciekły, są
+        przepisywane, a pozostałe kontynuują od zapamiętanego z - ich liczba trafia do last_stats['resumed'].
+
+        Returns:
+            macierz int32 (height, width) lub None jeśli liczenie zostało anulowane
+        """
+        if precision == PRECISION_AUTO:
+            precision = select_precision(min(self.dx, self.dy), preview)
+        self.last_stats = {"precision": precision}
+        resumed = self._resume_previous(max_iter, precision, smooth) if precision == PRECISION_FLOAT64 else None
+        if resumed is not None:
+            mset, fraction, known, orbit = resumed
+            self.last_reused = int(np.count_nonzero(known))
+            self.last_stats["resumed"] = int(np.count_nonzero(~known & ~np.isnan(orbit[0])))
+        else:
+            mset = np.zeros((self.height, self.width), dtype=np.int32)
+            known = np.zeros((self.height, self.width), dtype=np.bool_)
+            fraction = np.zeros((self.height, self.width), dtype=np.float32) if smooth else NO_FRACTION
+            orbit = None
+            if precision == PRECISION_FLOAT64:
+                orbit = (np.full((self.height, self.width), np.nan), np.full((self.height, self.width), np.nan))
+            self._reuse_previous(mset, fraction, orbit, known, max_iter, precision)
+
+        cache_tiles = self._cache_tiles()
+        cache_variant = (max_iter, precision, subdivide)
+        if cache_tiles:
+            self.last_stats["cache_tiles"] = self._fill_from_cache(
+                cache_tiles, mset, fraction, orbit, known, cache_variant,
+            )
+        compute = self._tile_kernel(precision, max_iter, subdivide, interior_checks, orbit)
+        tile_stats = []
+
+        progressive = on_pass is not None and not known.all()
+        for stride in (self._pass_strides() if progressive else [1]):
+            sub_mset = mset[::stride, ::stride]
+            sub_known = known[::stride, ::stride]
+            sub_fraction = fraction[::stride, ::stride]
+            sub_height, sub_width = sub_mset.shape
+
+            def tile_fn(row0, row1, col0, col1):
+                if not sub_known[row0:row1, col0:col1].all():
+                    tile_stats.append(compute(sub_mset, sub_fraction, sub_known, stride, row0, row1, col0, col1))
+
+            tile_size = max(8, DEFAULT_TILE_SIZE // stride)
+            if not run_tiles(tile_fn, sub_width, sub_height, n_threads, tile_size, should_cancel):
+                return None
+            sub_known[:] = True
+
+            if stride > 1:
+                blocks = np.repeat(np.repeat(sub_mset, stride, axis=0), stride, axis=1)
+                on_pass(blocks[:self.height, :self.width], stride)
+
+        for counts in tile_stats:
+            for key, value in counts.items():
+                self.last_stats[key] = self.last_stats.get(key, 0) + int(value)
+
+        for key, view_part, _, complete in cache_tiles:
+            if complete:
+                self.tile_cache.put(key + cache_variant, mset[view_part], fraction[view_part] if smooth else None)
+
+        self._image = mset
+        self.fraction = fraction if smooth else None
+        self._orbit = orbit
+        self._image_grid = (self.x0, self.y0, self.dx, self.dy, max_iter, precision)
+        return mset
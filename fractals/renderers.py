@@ -2,15 +2,17 @@ import multiprocessing
 from concurrent.futures import ThreadPoolExecutor
 
 import dearpygui.dearpygui as dpg
-import matplotlib
 import numpy as np
 
 from constants import (
     DPG_CONTROL_GROUP,
+    DPG_MANDELBROT_IMG_ID,
     DPG_PLOT,
     DPG_RIGHT_PANEL,
     DPG_STATUS_TEXT,
+    DPG_TEXTURE_TAG,
 )
+from mandelbrot_colors import colorize, colorize_density
 
 
 def _convert_batch_to_list(args):
@@ -108,6 +110,50 @@ def create_line_theme(line_tag, color, line_width, theme_prefix):
     )
 
 
+# Punkty na jedną serię odcinków - większe zbiory dzielone są na kilka serii (jeden motyw dla wszystkich)
+MAX_SEGMENT_SERIES_POINTS = 2_000_000
+
+
+def polygon_segments(polygons):
+    """
+    Odcinki boków wielokątów zamkniętych jako pary końców - format serii z segments=True
+    (każde dwa kolejne punkty to osobny odcinek, bez linii łączących wielokąty).
+
+    Args:
+        polygons: tablica (m, k, 2) - m wielokątów o k wierzchołkach
+
+    Returns:
+        tablica (m * k * 2, 2) końców odcinków
+    """
+    polygons = np.asarray(polygons, dtype=np.float64)
+    return np.stack((polygons, np.roll(polygons, -1, axis=1)), axis=2).reshape(-1, 2)
+
+
+def add_segment_series(segments, parent, color, line_width, theme_prefix):
+    """
+    Rysuje wiele odcinków jedną serią linii (albo kilkoma po MAX_SEGMENT_SERIES_POINTS punktów)
+    z jednym motywem - zamiast serii i wiązania motywu na każdą figurę, co spowalnia budowanie
+    wykresu i każdą klatkę. Tablice NumPy trafiają do DearPyGui bez konwersji na listy.
+
+    Args:
+        segments: tablica (2s, 2) końców s odcinków (np. z polygon_segments())
+        parent: oś Y wykresu
+
+    Returns:
+        lista tagów utworzonych serii
+    """
+    segments = np.asarray(segments, dtype=np.float64)
+    tags = []
+    for start in range(0, len(segments), MAX_SEGMENT_SERIES_POINTS):
+        chunk = segments[start:start + MAX_SEGMENT_SERIES_POINTS]
+        line_tag = dpg.add_line_series(
+            np.ascontiguousarray(chunk[:, 0]), np.ascontiguousarray(chunk[:, 1]), parent=parent, segments=True,
+        )
+        create_line_theme(line_tag, color, line_width, theme_prefix)
+        tags.append(line_tag)
+    return tags
+
+
 def _create_scatter_plot(points, n_points, plot_label, color_tag, size_tag, theme_prefix, equal_aspects=True):
     points = np.array(points)
     if points.ndim != 2 or points.shape[1] != 2:
@@ -140,10 +186,73 @@ def _create_scatter_plot(points, n_points, plot_label, color_tag, size_tag, them
     dpg.fit_axis_data(primary_y)
 
 
-def create_mandelbrot_texture(mandelbrot_array, max_iter):
-    mandelbrot_array = np.flipud(mandelbrot_array)
-    normalized_array = mandelbrot_array / max_iter
-    hot_colormap = matplotlib.colormaps["hot"]
-    colors = hot_colormap(normalized_array)
-    return colors.astype(np.float32).flatten()
-
+def create_mandelbrot_texture(mandelbrot_array, max_iter, fraction=None, out=None):
+    """
+    Dane tekstury float32 RGBA (płaskie) - kolorowanie przez LUT w mandelbrot_colors.colorize().
+    out pozwala przekazać bufor (height, width, 4) z poprzedniej klatki zamiast alokować nowy.
+    """
+    return colorize(mandelbrot_array, max_iter, fraction, out=out).reshape(-1)
+
+
+def create_density_texture(density, out=None):
+    """
+    Dane tekstury float32 RGBA (płaskie) dla rastra gęstości (Buddhabrot) - skala logarytmiczna,
+    kolorowanie przez LUT w mandelbrot_colors.colorize_density(). out jak w create_mandelbrot_texture().
+    """
+    return colorize_density(density, out=out).reshape(-1)
+
+
+class DoubleBufferedTexture:
+    """
+    Tekstura obrazu (raw texture DearPyGui) z dwoma buforami float32 RGBA alokowanymi raz na rozdzielczość.
+    Raw texture nie kopiuje danych, tylko czyta wskazany bufor przy każdym rysowaniu klatki, więc
+    nowa klatka trafia do bufora tylnego, a present() podmienia bufory - GUI nigdy nie rysuje
+    bufora w trakcie zapisu. Kolejne rendery, przebiegi progresywne i animacje nie alokują pamięci
+    ani nie usuwają/odtwarzają tekstury i obrazka (brak migania).
+    """
+    def __init__(self, texture_tag=DPG_TEXTURE_TAG, image_tag=DPG_MANDELBROT_IMG_ID, parent=DPG_RIGHT_PANEL):
+        self.texture_tag = texture_tag
+        self.image_tag = image_tag
+        self.parent = parent
+        self.width = 0
+        self.height = 0
+        self._front = None
+        self._back = None
+
+    def back_buffer(self, width, height):
+        """
+        Bufor (height, width, 4) na następną klatkę. Przy zmianie rozdzielczości alokuje
+        bufory i teksturę od nowa - tylko wtedy.
+        """
+        if (width, height) != (self.width, self.height) or not dpg.does_item_exist(self.texture_tag):
+            self._allocate(width, height)
+        return self._back
+
+    def _allocate(self, width, height):
+        self.hide()
+        if dpg.does_item_exist(self.texture_tag):
+            dpg.delete_item(self.texture_tag)
+
+        self.width, self.height = width, height
+        self._front = np.zeros((height, width, 4), dtype=np.float32)
+        self._back = np.zeros((height, width, 4), dtype=np.float32)
+        with dpg.texture_registry(show=False):
+            dpg.add_raw_texture(
+                width,
+                height,
+                self._front.reshape(-1),
+                format=dpg.mvFormat_Float_rgba,  # type: ignore
+                tag=self.texture_tag,
+            )
+
+    def present(self):
+        """Pokazuje bufor tylny (zamiana z przednim) i dodaje obrazek, jeśli go jeszcze nie ma."""
+        dpg.set_value(self.texture_tag, self._back.reshape(-1))
+        self._front, self._back = self._back, self._front
+        if not dpg.does_item_exist(self.image_tag):
+            dpg.add_image(self.texture_tag, width=self.width, height=self.height, tag=self.image_tag, parent=self.parent)
+
+    def hide(self):
+        """Usuwa obrazek z panelu (tekstura i bufory zostają do kolejnego renderu)."""
+        if dpg.does_item_exist(self.image_tag):
+            dpg.delete_item(self.image_tag)
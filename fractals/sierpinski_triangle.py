@@ -1,79 +1,314 @@
 import numpy as np
+from numba import jit
 
-def sierpinski_triangle_chaos_game(n_points=10000):
+from chaos_game import BURN_IN, POINTS_PER_STREAM, RANDOM_BLOCK
+from mandelbrot_engine import run_tiles
+
+# Reguły wyboru kolejnego wierzchołka w chaos game (względem wierzchołka wybranego poprzednio)
+VERTEX_RULE_ANY = 0
+VERTEX_RULE_NOT_SAME = 1
+VERTEX_RULE_NOT_NEIGHBOUR = 2
+VERTEX_RULES = {
+    "Dowolny wierzcholek": VERTEX_RULE_ANY,
+    "Rozny od poprzedniego": VERTEX_RULE_NOT_SAME,
+    "Bez sasiadow poprzedniego": VERTEX_RULE_NOT_NEIGHBOUR,
+}
+
+SIERPINSKI_VERTICES = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])
+# Maksymalna głębokość leniwego podziału - bok 2^-50 to granica dokładności float64
+LAZY_MAX_DEPTH = 50
+
+
+def regular_polygon(n_vertices):
+    """
+    Wierzchołki n-kąta foremnego wpisanego w okrąg jednostkowy, pierwszy na górze.
+
+    Returns:
+        numpy array kształtu (n_vertices, 2)
+    """
+    if n_vertices < 3:
+        raise ValueError("Wielokat musi miec co najmniej 3 wierzcholki.")
+    angles = np.pi / 2 + 2 * np.pi * np.arange(n_vertices) / n_vertices
+    return np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+@jit(nopython=True, nogil=True)
+def _allowed_vertices(n_vertices, rule):
+    """Liczba wierzchołków dozwolonych po danym (reguła rule) - losowanie odbywa się tylko wśród nich."""
+    if rule == VERTEX_RULE_NOT_SAME:
+        return n_vertices - 1
+    if rule == VERTEX_RULE_NOT_NEIGHBOUR:
+        return n_vertices - 2
+    return n_vertices
+
+
+@jit(nopython=True, nogil=True)
+def chaos_game_polygon_stream(points, start, count, vertices, ratio, rule, burn_in, seed):
     """
-    Generuje trójkąt Sierpińskiego metodą chaos game.
+    Jeden strumień chaos game dla wielokąta: punkt przesuwa się o ułamek ratio odległości do
+    losowego wierzchołka (ratio=0.5 i trójkąt - trójkąt Sierpińskiego). Reguła ogranicza
+    wybór względem poprzedniego wierzchołka; dozwolone wierzchołki losowane są wprost
+    (przesunięcie indeksu), bez odrzucania. Wynik trafia do points[start:start + count].
+    """
+    np.random.seed(seed)
+    n_vertices = vertices.shape[0]
+    choices = _allowed_vertices(n_vertices, rule)
+    # start w środku ciężkości wierzchołków
+    x = 0.0
+    y = 0.0
+    for v in range(n_vertices):
+        x += vertices[v, 0] / n_vertices
+        y += vertices[v, 1] / n_vertices
+    previous = 0
+    total = burn_in + count
+    for block_start in range(0, total, RANDOM_BLOCK):
+        block = np.random.random(min(RANDOM_BLOCK, total - block_start)) * choices
+        for b in range(block.shape[0]):
+            k = min(int(block[b]), choices - 1)
+            if rule == VERTEX_RULE_NOT_SAME:
+                # przesunięcia 1..n-1 względem poprzedniego
+                vertex = (previous + 1 + k) % n_vertices
+            elif rule == VERTEX_RULE_NOT_NEIGHBOUR:
+                # przesunięcia 0, 2, 3, ..., n-2 - bez sąsiadów po obu stronach
+                vertex = (previous + (k + 1 if k > 0 else 0)) % n_vertices
+            else:
+                vertex = k
+            previous = vertex
+            x += ratio * (vertices[vertex, 0] - x)
+            y += ratio * (vertices[vertex, 1] - y)
+
+            index = block_start + b - burn_in
+            if index >= 0:
+                points[start + index, 0] = x
+                points[start + index, 1] = y
+
+
+def sierpinski_triangle_chaos_game(
+    n_points=10000, vertices=None, ratio=0.5, rule=VERTEX_RULE_ANY, seed=None, n_threads=None,
+    should_cancel=None,
+):
+    """
+    Generuje trójkąt Sierpińskiego (albo fraktal dowolnego wielokąta) metodą chaos game.
+    Punkty liczone są skompilowanym kernelem do gotowej tablicy, niezależnymi strumieniami
+    na wielu wątkach jak w chaos_game() - ten sam seed daje te same punkty niezależnie od
+    liczby wątków.
     
     Args:
         n_points: liczba punktów do wygenerowania
+        vertices: wierzchołki (n, 2), domyślnie trójkąt Sierpińskiego
+        ratio: ułamek odległości do wierzchołka pokonywany w każdym kroku (0 < ratio < 1)
+        rule: reguła wyboru wierzchołka (VERTEX_RULE_*)
+        seed: ziarno (None - losowe przy każdym wywołaniu)
+        n_threads: liczba wątków (domyślnie liczba rdzeni)
     
     Returns:
-        numpy array kształtu (n_points, 2) z współrzędnymi punktów
+        numpy array kształtu (n_points, 2) z współrzędnymi punktów lub None jeśli przerwano
     """
-    # pomijamy pierwsze 20 iteracji - punkt startowy i pierwsze iteracje nie są częścią fraktala
-    # (są tylko pomocnicze do "rozgrzania" algorytmu), więc nie zapisujemy ich do wyników
-    vertices = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])
-    current_point = np.array([0.5, np.sqrt(3)/6])
-    
-    skip_iterations = 20
-    for _ in range(skip_iterations):
-        vertex = vertices[np.random.randint(3)]
-        current_point = (current_point + vertex) / 2
-    
-    points = []
-    for _ in range(n_points):
-        vertex = vertices[np.random.randint(3)]
-        current_point = (current_point + vertex) / 2
-        points.append(current_point.copy())
-    
-    return np.array(points)
+    vertices = np.ascontiguousarray(SIERPINSKI_VERTICES if vertices is None else vertices, dtype=np.float64)
+    if not 0.0 < ratio < 1.0:
+        raise ValueError("Wspolczynnik skoku musi byc z przedzialu (0, 1).")
+    if _allowed_vertices(len(vertices), rule) < 2:
+        raise ValueError("Regula wyboru zostawia mniej niz 2 wierzcholki - za malo wierzcholkow.")
+
+    n_streams = max(1, -(-n_points // POINTS_PER_STREAM))
+    stream_seeds = np.random.SeedSequence(seed).generate_state(n_streams)
+    points = np.empty((n_points, 2), dtype=np.float64)
+
+    def stream_fn(_row0, _row1, stream0, stream1):
+        for stream in range(stream0, stream1):
+            start = stream * POINTS_PER_STREAM
+            chaos_game_polygon_stream(
+                points, start, min(POINTS_PER_STREAM, n_points - start), vertices, ratio, rule, BURN_IN,
+                int(stream_seeds[stream]),
+            )
+
+    if not run_tiles(stream_fn, n_streams, 1, n_threads, 1, should_cancel):
+        return None
+    return points
+
+
+def subdivide_triangles(triangles):
+    """
+    Jeden poziom podziału: każdy trójkąt (a, b, c) zastępują trzy narożne trójkąty
+    (a, ab, ca), (ab, b, bc), (ca, bc, c) - operacjami na całych tablicach. Potomkowie
+    trójkąta leżą obok siebie, więc kolejność jest taka jak przy podziale rekurencyjnym.
+
+    Args:
+        triangles: tablica (m, 3, 2) wierzchołków trójkątów
+
+    Returns:
+        tablica (3m, 3, 2)
+    """
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    children = np.empty((len(triangles), 3, 3, 2), dtype=np.float64)
+    children[:, 0, 0] = a
+    children[:, 1, 1] = b
+    children[:, 2, 2] = c
+    # środki boków liczone raz, wprost do bufora, i kopiowane do drugiego trójkąta, który je dzieli
+    for midpoint, p, q in (((0, 1), a, b), ((1, 2), b, c), ((2, 0), c, a)):
+        first = children[:, midpoint[0], midpoint[1]]
+        np.add(p, q, out=first)
+        first *= 0.5
+        children[:, midpoint[1], midpoint[0]] = first
+    return children.reshape(-1, 3, 2)
 
 
 def sierpinski_triangle_recursive(n, should_cancel=None):
     """
-    Generuje trójkąt Sierpińskiego metodą rekurencyjną.
-    Zwraca listę trójkątów (każdy trójkąt to 3 wierzchołki) do rysowania linii.
+    Generuje trójkąt Sierpińskiego przez podział trójkątów poziom po poziomie (wszerz):
+    cały poziom to jedna tablica (3^k, 3, 2), a następny powstaje z niej w subdivide_triangles()
+    - bez rekurencji i bez obiektów Pythona na trójkąt.
     
     Args:
         n: poziom rekursji (głębokość podziału)
         should_cancel: opcjonalna funkcja zwracająca True jeśli generowanie ma być anulowane
+            (sprawdzana raz na poziom)
     
     Returns:
-        lista trójkątów, każdy trójkąt to lista 3 wierzchołków (punkty [x, y])
+        tablica (3^n, 3, 2) trójkątów (3 wierzchołki [x, y] każdy) do rysowania linii
         lub None jeśli generowanie zostało anulowane
     """
-    def generate_triangles(vertices, depth):
-        # Sprawdź flagę anulowania na początku każdej rekurencji
+    triangles = SIERPINSKI_VERTICES[np.newaxis].astype(np.float64)
+    for _ in range(n):
         if should_cancel and should_cancel():
             return None
-        
-        if depth == 0:
-            return [vertices]
-        
+        triangles = subdivide_triangles(triangles)
+    return triangles
 
-        mid1 = (vertices[0] + vertices[1]) / 2
-        mid2 = (vertices[1] + vertices[2]) / 2
-        mid3 = (vertices[2] + vertices[0]) / 2
 
-        triangles = []
-        result1 = generate_triangles([vertices[0], mid1, mid3], depth - 1)
-        if result1 is None:
-            return None
-        triangles.extend(result1)
-        
-        result2 = generate_triangles([mid1, vertices[1], mid2], depth - 1)
-        if result2 is None:
+def sierpinski_visible_triangles(pixel_size, bounds=None, should_cancel=None):
+    """
+    Leniwe generowanie trójkąta Sierpińskiego dla widoku: podział poziom po poziomie tylko
+    trójkątów przecinających widok, aż ich bok będzie nie większy niż piksel. Praca i pamięć
+    zależą od widocznej części, a nie od przybliżenia - aż do granicy dokładności float64
+    (LAZY_MAX_DEPTH).
+
+    Args:
+        pixel_size: rozmiar piksela w jednostkach wykresu
+        bounds: (xmin, xmax, ymin, ymax) widoku, None - cała figura
+        should_cancel: opcjonalna funkcja zwracająca True jeśli generowanie ma być anulowane
+            (sprawdzana raz na poziom)
+
+    Returns:
+        tablica (m, 3, 2) widocznych trójkątów lub None jeśli generowanie zostało anulowane
+    """
+    if pixel_size <= 0.0:
+        raise ValueError("Rozmiar piksela musi byc dodatni.")
+
+    triangles = SIERPINSKI_VERTICES[np.newaxis].astype(np.float64)
+    side = 1.0
+    for _ in range(LAZY_MAX_DEPTH + 1):
+        if bounds is not None:
+            xmin, xmax, ymin, ymax = bounds
+            low = triangles.min(axis=1)
+            high = triangles.max(axis=1)
+            triangles = triangles[
+                (low[:, 0] <= xmax) & (high[:, 0] >= xmin) & (low[:, 1] <= ymax) & (high[:, 1] >= ymin)
+            ]
+        if side <= pixel_size or len(triangles) == 0:
+            break
+        if should_cancel and should_cancel():
             return None
-        triangles.extend(result2)
+        triangles = subdivide_triangles(triangles)
+        side /= 2.0
+    return triangles
+
+
+if __name__ == "__main__":
+    import time
+
+    def python_chaos_game(n_points):
+        """Poprzednia wersja (pętla Pythona z listą kopii punktów) do porównania."""
+        vertices = SIERPINSKI_VERTICES
+        current_point = np.array([0.5, np.sqrt(3)/6])
+        points = []
+        for _ in range(n_points):
+            vertex = vertices[np.random.randint(3)]
+            current_point = (current_point + vertex) / 2
+            points.append(current_point.copy())
+        return np.array(points)
+
+    def recursive_triangles(n, should_cancel=None):
+        """Poprzednia wersja (rekurencja, listy trójkątów) do porównania."""
+        def generate_triangles(vertices, depth):
+            # Sprawdź flagę anulowania na początku każdej rekurencji
+            if should_cancel and should_cancel():
+                return None
+            
+            if depth == 0:
+                return [vertices]
+            
+
+            mid1 = (vertices[0] + vertices[1]) / 2
+            mid2 = (vertices[1] + vertices[2]) / 2
+            mid3 = (vertices[2] + vertices[0]) / 2
+
+            triangles = []
+            result1 = generate_triangles([vertices[0], mid1, mid3], depth - 1)
+            if result1 is None:
+                return None
+            triangles.extend(result1)
+            
+            result2 = generate_triangles([mid1, vertices[1], mid2], depth - 1)
+            if result2 is None:
+                return None
+            triangles.extend(result2)
+            
+            result3 = generate_triangles([mid3, mid2, vertices[2]], depth - 1)
+            if result3 is None:
+                return None
+            triangles.extend(result3)
+            
+            return triangles
         
-        result3 = generate_triangles([mid3, mid2, vertices[2]], depth - 1)
-        if result3 is None:
-            return None
-        triangles.extend(result3)
+        main_vertices = SIERPINSKI_VERTICES
+        triangles = generate_triangles(main_vertices, n)
         
         return triangles
-    
-    main_vertices = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])
-    triangles = generate_triangles(main_vertices, n)
-    
-    return triangles
+
+    for depth in range(7):
+        if not np.array_equal(np.array(recursive_triangles(depth)), sierpinski_triangle_recursive(depth)):
+            raise RuntimeError("Podzial poziomami rozni sie od rekurencji.")
+
+    print("Trojkaty Sierpinskiego (podzial):")
+    print(f"{'poziom':>7} {'trojkaty':>10} {'rekurencja [s]':>15} {'poziomami [s]':>14} {'pamiec [MB]':>12}")
+    for depth in (6, 8, 10, 12, 14):
+        recursive_time = float("nan")
+        if depth <= 10:
+            start = time.perf_counter()
+            recursive_triangles(depth, lambda: False)
+            recursive_time = time.perf_counter() - start
+        start = time.perf_counter()
+        triangles = sierpinski_triangle_recursive(depth, lambda: False)
+        elapsed = time.perf_counter() - start
+        print(f"{depth:>7} {len(triangles):>10} {recursive_time:>15.3f} {elapsed:>14.3f} {triangles.nbytes / 2**20:>12.1f}")
+
+    # leniwe generowanie: przy przybliżaniu w punkt figury koszt zostaje stały
+    print("Leniwe generowanie (widok 1000 pikseli wokol punktu figury):")
+    center = sierpinski_triangle_recursive(8)[1234, 1]
+    for zoom in (1, 1e3, 1e6, 1e9, 1e12):
+        half = 0.75 / zoom
+        bounds = (center[0] - half, center[0] + half, center[1] - half, center[1] + half)
+        start = time.perf_counter()
+        triangles = sierpinski_visible_triangles(2 * half / 1000, bounds)
+        elapsed = time.perf_counter() - start
+        print(f"  przyblizenie {zoom:>7.0e}: {len(triangles):>7} trojkatow, {elapsed:.4f} s")
+    print()
+
+    sierpinski_triangle_chaos_game(1000)
+    n_old, n_new = 200_000, 20_000_000
+    start = time.perf_counter()
+    python_chaos_game(n_old)
+    old = (time.perf_counter() - start) / n_old
+    start = time.perf_counter()
+    sierpinski_triangle_chaos_game(n_new, seed=0)
+    new = (time.perf_counter() - start) / n_new
+    print("Chaos game trojkata Sierpinskiego:")
+    print(f"  petla Pythona: {old * 1e9:8.1f} ns/punkt ({n_old} punktow)")
+    print(f"  kernel Numba:  {new * 1e9:8.1f} ns/punkt ({n_new} punktow), {old / new:.0f}x szybciej")
+
+    for n_vertices, ratio, rule in ((5, 0.618, VERTEX_RULE_ANY), (4, 0.5, VERTEX_RULE_NOT_SAME), (5, 0.5, VERTEX_RULE_NOT_NEIGHBOUR)):
+        start = time.perf_counter()
+        sierpinski_triangle_chaos_game(n_new, regular_polygon(n_vertices), ratio, rule, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"  {n_vertices}-kat, ratio={ratio}, regula {rule}: {elapsed / n_new * 1e9:8.1f} ns/punkt")